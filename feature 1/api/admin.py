@@ -0,0 +1,56 @@
+import hmac
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from extractor.catalog import catalog_info, reload_if_changed
+from extractor.llm_parser import get_llm_cache, llm_breaker
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Actions that change server state (cache purge, catalog reload) need this
+# token in X-Admin-Token; they are refused while it is unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin actions are disabled (ADMIN_TOKEN is not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+
+@router.get("/llm-cache")
+def llm_cache_stats() -> Dict[str, Any]:
+    cache = get_llm_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="LLM cache is disabled")
+    return cache.stats()
+
+
+@router.delete("/llm-cache", dependencies=[Depends(require_admin_token)])
+def purge_llm_cache() -> Dict[str, Any]:
+    cache = get_llm_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="LLM cache is disabled")
+    return {"purged": cache.purge()}
+
+
+@router.get("/llm-breaker")
+def llm_breaker_state() -> Dict[str, Any]:
+    return llm_breaker.stats()
+
+
+@router.get("/catalog")
+def catalog_state() -> Dict[str, Any]:
+    return catalog_info()
+
+
+@router.post("/catalog/reload", dependencies=[Depends(require_admin_token)])
+def reload_catalog() -> Dict[str, Any]:
+    """
+    Check the CSV now instead of waiting for the next watcher poll.
+    """
+    reloaded = reload_if_changed()
+    return {"reloaded": reloaded, **catalog_info()}
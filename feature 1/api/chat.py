@@ -1,15 +1,25 @@
+import asyncio
+import json
 from typing import List, Dict, Any, Optional
 
 from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from extractor import extract_order
+from extractor import extract_order_async, stream_order_async, MedicineRequest, ParsedOrder
+from extractor.batch import extract_orders_batch, MAX_BATCH_SIZE
+from extractor.session import preview_sessions
+
+# Longer than any typed order; bounds the work one keystroke can cause
+PREVIEW_MAX_CHARS = 2000
 
 router = APIRouter()
 
 
 class ChatOrderRequest(BaseModel):
     message: str
+    # Overrides the default LLM fallback latency budget (LLM_BUDGET_S)
+    llm_budget_ms: Optional[int] = Field(default=None, ge=0)
 
 
 class MedicineOut(BaseModel):
@@ -22,6 +32,7 @@ class MedicineOut(BaseModel):
     pzn: Optional[str] = None
     price_rec: Optional[float] = None
     package_size: Optional[str] = None
+    confidence: Optional[Dict[str, float]] = None
 
 
 class ParsedOrderOut(BaseModel):
@@ -33,29 +44,139 @@ class ParsedOrderOut(BaseModel):
     meta: Dict[str, Any]
 
 
-@router.post("/chat/order", response_model=ParsedOrderOut)
-def parse_order(req: ChatOrderRequest) -> ParsedOrderOut:
-    parsed = extract_order(req.message)
+class PreviewRequest(BaseModel):
+    session_id: str = Field(..., min_length=1, max_length=128)
+    message: str = Field(..., max_length=PREVIEW_MAX_CHARS)
+
+
+class PreviewOut(BaseModel):
+    session_id: str
+    medicines: List[MedicineOut]
+    meta: Dict[str, Any]
+
+
+class BatchOrderRequest(BaseModel):
+    messages: List[str] = Field(..., max_length=MAX_BATCH_SIZE)
+    llm_budget_ms: Optional[int] = Field(default=None, ge=0)
+
+
+class BatchOrderItem(BaseModel):
+    index: int
+    result: Optional[ParsedOrderOut] = None
+    error: Optional[str] = None
+
+
+class BatchOrderResponse(BaseModel):
+    results: List[BatchOrderItem]
+
+
+def _medicine_dict(m: MedicineRequest) -> Dict[str, Any]:
+    return {
+        "name": m.name,
+        "matched_name": m.matched_name,
+        "dosage": m.dosage,
+        "quantity": m.quantity,
+        "dosage_details": m.dosage_details,
+        "product_id": m.product_id,
+        "pzn": m.pzn,
+        "price_rec": m.price_rec,
+        "package_size": m.package_size,
+        "confidence": m.confidence,
+    }
+
+
+def _to_out(parsed: ParsedOrder) -> ParsedOrderOut:
     # Convert dataclass to dict and then validate
     parsed_dict = {
         "original_text": parsed.original_text,
         "normalized_text": parsed.normalized_text,
         "language": parsed.language,
         "translated_text": parsed.translated_text,
-        "medicines": [
-            {
-                "name": m.name,
-                "matched_name": m.matched_name,
-                "dosage": m.dosage,
-                "quantity": m.quantity,
-                "dosage_details": m.dosage_details,
-                "product_id": m.product_id,
-                "pzn": m.pzn,
-                "price_rec": m.price_rec,
-                "package_size": m.package_size
-            }
-            for m in parsed.medicines
-        ],
+        "medicines": [_medicine_dict(m) for m in parsed.medicines],
         "meta": parsed.meta
     }
-    return ParsedOrderOut.model_validate(parsed_dict)
\ No newline at end of file
+    return ParsedOrderOut.model_validate(parsed_dict)
+
+
+def _budget_s(budget_ms: Optional[int]) -> Optional[float]:
+    return budget_ms / 1000.0 if budget_ms is not None else None
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/order", response_model=ParsedOrderOut)
+async def parse_order(req: ChatOrderRequest) -> ParsedOrderOut:
+    parsed = await extract_order_async(req.message, _budget_s(req.llm_budget_ms))
+    return _to_out(parsed)
+
+
+@router.post("/chat/order/stream")
+async def stream_order(req: ChatOrderRequest) -> StreamingResponse:
+    """
+    Server-Sent Events version of /chat/order.
+
+    Emits one `medicine` event (a MedicineOut) per medicine as soon as it is
+    known, then a `done` event with the full ParsedOrderOut, or an `error`
+    event if extraction fails mid-stream.
+    """
+
+    async def events():
+        try:
+            async for kind, payload in stream_order_async(req.message, _budget_s(req.llm_budget_ms)):
+                if kind == "medicine":
+                    yield _sse("medicine", MedicineOut.model_validate(_medicine_dict(payload)).model_dump())
+                else:
+                    yield _sse("done", _to_out(payload).model_dump())
+        except Exception as exc:
+            yield _sse("error", {"detail": f"{type(exc).__name__}: {exc}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/chat/preview", response_model=PreviewOut)
+async def preview_order(req: PreviewRequest) -> PreviewOut:
+    """
+    Type-ahead preview: rule-based parse of the message as typed so far.
+
+    Send the full current text on every edit with the same client-chosen
+    session_id; only the changed part is re-parsed. The parse runs on the
+    threadpool: a first update or a paste re-parses the whole message. The
+    LLM is never used; submit with /chat/order for the final parse.
+    """
+    session = preview_sessions.get(req.session_id)
+    parsed = await asyncio.to_thread(session.update, req.message)
+    return PreviewOut(
+        session_id=req.session_id,
+        medicines=[MedicineOut.model_validate(_medicine_dict(m)) for m in parsed.medicines],
+        meta=parsed.meta,
+    )
+
+
+@router.delete("/chat/preview/{session_id}")
+async def end_preview(session_id: str) -> Dict[str, bool]:
+    preview_sessions.drop(session_id)
+    return {"ok": True}
+
+
+@router.post("/chat/orders/batch", response_model=BatchOrderResponse)
+async def parse_orders_batch(req: BatchOrderRequest) -> BatchOrderResponse:
+    """
+    Parse many messages in one call. Results come back in input order; a
+    failing item carries an error instead of failing the whole batch.
+    """
+    items: List[BatchOrderItem] = []
+    for i, (parsed, error) in enumerate(await extract_orders_batch(req.messages, _budget_s(req.llm_budget_ms))):
+        items.append(
+            BatchOrderItem(
+                index=i,
+                result=_to_out(parsed) if parsed is not None else None,
+                error=error,
+            )
+        )
+    return BatchOrderResponse(results=items)
@@ -0,0 +1,110 @@
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from extractor.catalog import current_catalog
+from extractor.circuit import CLOSED, HALF_OPEN, OPEN
+from extractor.llm_parser import get_llm_cache, llm_breaker
+from extractor.medicine import phrase_memo
+from extractor.metrics import render, render_samples
+from voice.pool import stt_pool
+from voice.tts_cache import get_audio_cache
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _scrape_time_metrics() -> List[List[str]]:
+    snap = current_catalog()
+    blocks = [
+        render_samples("catalog_products", "Products in the live catalog snapshot.", [({}, len(snap.products))]),
+        render_samples("catalog_info", "Live catalog snapshot version.", [({"version": snap.version}, 1)]),
+        render_samples(
+            "llm_breaker_state",
+            "LLM circuit breaker state (0 closed, 1 half open, 2 open).",
+            [({}, _BREAKER_STATES.get(llm_breaker.state, 0))],
+        ),
+    ]
+
+    memo = phrase_memo.stats()
+    blocks.append(
+        render_samples(
+            "phrase_memo_lookups_total",
+            "Fuzzy-match memo lookups by result.",
+            [({"result": "hit"}, memo["hits"]), ({"result": "miss"}, memo["misses"])],
+            kind="counter",
+        )
+    )
+    blocks.append(
+        render_samples("phrase_memo_evictions_total", "Phrases evicted from the memo.", [({}, memo["evictions"])], kind="counter")
+    )
+    blocks.append(render_samples("phrase_memo_entries", "Phrases in the fuzzy-match memo.", [({}, memo["entries"])]))
+
+    stt = stt_pool.stats()
+    blocks.append(render_samples("stt_jobs_in_flight", "STT jobs receiving audio, queued or running.", [({}, stt["in_flight"])]))
+    blocks.append(
+        render_samples(
+            "stt_jobs_total",
+            "STT jobs by outcome.",
+            [
+                ({"status": "finished"}, stt["finished"]),
+                ({"status": "rejected"}, stt["rejected"]),
+                ({"status": "timeout"}, stt["timeouts"]),
+            ],
+            kind="counter",
+        )
+    )
+    blocks.append(
+        render_samples(
+            "stt_pool_recycles_total", "STT pools killed after a job timed out.", [({}, stt["recycled"])], kind="counter"
+        )
+    )
+
+    audio = get_audio_cache()
+    if audio is not None:
+        tts = audio.stats()
+        blocks.append(
+            render_samples(
+                "tts_cache_lookups_total",
+                "TTS segment cache lookups by result.",
+                [
+                    ({"result": "hit_memory"}, tts["hits_memory"]),
+                    ({"result": "hit_disk"}, tts["hits_disk"]),
+                    ({"result": "miss"}, tts["misses"]),
+                ],
+                kind="counter",
+            )
+        )
+
+    cache = get_llm_cache()
+    if cache is not None:
+        stats = cache.stats()
+        blocks.append(
+            render_samples(
+                "llm_cache_hits_total",
+                "LLM cache hits.",
+                [({"tier": "memory"}, stats["hits_memory"]), ({"tier": "disk"}, stats["hits_disk"])],
+                kind="counter",
+            )
+        )
+        blocks.append(render_samples("llm_cache_misses_total", "LLM cache misses.", [({}, stats["misses"])], kind="counter"))
+        blocks.append(
+            render_samples(
+                "llm_cache_entries",
+                "Entries in the LLM cache.",
+                [({"tier": "memory"}, stats["memory_entries"]), ({"tier": "disk"}, stats["disk_entries"])],
+            )
+        )
+    return blocks
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint. LLM fallback rate:
+    rate(llm_fallback_total[5m]) / rate(orders_total[5m]).
+    """
+    return PlainTextResponse(render(_scrape_time_metrics()), media_type=PROMETHEUS_CONTENT_TYPE)
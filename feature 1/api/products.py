@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from extractor import find_product_by_id, find_product_by_pzn
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+
+class ProductOut(BaseModel):
+    product_id: str
+    name: str
+    pzn: str
+    price_rec: Optional[float] = None
+    package_size: Optional[str] = None
+    description: Optional[str] = None
+
+
+@router.get("/pzn/{pzn}", response_model=ProductOut)
+def product_by_pzn(pzn: str) -> ProductOut:
+    product = find_product_by_pzn(pzn, with_description=True)
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"No product with PZN {pzn}")
+    return ProductOut.model_validate(product)
+
+
+@router.get("/{product_id}", response_model=ProductOut)
+def product_by_id(product_id: str) -> ProductOut:
+    product = find_product_by_id(product_id, with_description=True)
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"No product with id {product_id}")
+    return ProductOut.model_validate(product)
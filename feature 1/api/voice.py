@@ -1,30 +1,255 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from extractor import extract_order
-from voice.stt import speech_to_text
+import asyncio
+from urllib.parse import quote
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.formparsers import MultiPartException
+
+from extractor import MedicineRequest, ParsedOrder, extract_order_async, extract_order_rule_based
+from voice.ingest import (
+    MULTIPART_OVERHEAD,
+    VOICE_MAX_BYTES,
+    UploadTooLarge,
+    audio_stream,
+    bounded,
+    check_declared_size,
+    multipart_file,
+    upload_chunks,
+)
+from voice.pool import STTTimeout, STTUnavailable, stt_pool
+from voice.stt import transcribe_stream
+from voice.tts import FORMATS, TTS_VOICE, confirmation_text, stream_speech
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
-@router.post("/order")
-async def voice_order(file: UploadFile = File(...)):
-    audio_bytes = await file.read()
-    text = speech_to_text(audio_bytes)
-    if not text:
-        raise HTTPException(status_code=400, detail="Could not transcribe audio")
-    parsed = extract_order(text)
+TTS_MAX_CHARS = 2000
+
+
+class SpeakRequest(BaseModel):
+    text: str = Field(..., max_length=TTS_MAX_CHARS)
+    voice: str = TTS_VOICE
+    format: str = Field(default="wav", pattern="^(wav|pcm)$")
+
+
+class ConfirmRequest(BaseModel):
+    message: str
+    voice: str = TTS_VOICE
+    format: str = Field(default="wav", pattern="^(wav|pcm)$")
+
+
+def _too_large(exc: UploadTooLarge) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Audio upload larger than {exc.limit} bytes")
+
+
+def _medicines_out(medicines: List[MedicineRequest]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": m.name,
+            "matched_name": m.matched_name,
+            "dosage": m.dosage,
+            "quantity": m.quantity,
+        }
+        for m in medicines
+    ]
+
+
+def _voice_response(text: str, parsed: ParsedOrder) -> Dict[str, Any]:
     return {
         "transcript": text,
         "parsed": {
             "original_text": parsed.original_text,
             "language": parsed.language,
             "translated_text": parsed.translated_text,
-            "medicines": [
-                {
-                    "name": m.name,
-                    "matched_name": m.matched_name,
-                    "dosage": m.dosage,
-                    "quantity": m.quantity,
+            "medicines": _medicines_out(parsed.medicines),
+        },
+    }
+
+
+def _stt_busy(exc: STTUnavailable) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+
+async def _transcribe_and_extract(chunks, reserved: bool = False) -> Dict[str, Any]:
+    try:
+        # Backends take whole clips, so a read-ahead buffer would not overlap anything here
+        text = await stt_pool.transcribe_chunks(bounded(chunks), reserved=reserved)
+    except UploadTooLarge as exc:
+        raise _too_large(exc)
+    except STTUnavailable as exc:
+        raise _stt_busy(exc)
+    except STTTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    if not text:
+        raise HTTPException(status_code=400, detail="Could not transcribe audio")
+    parsed = await extract_order_async(text)
+    return _voice_response(text, parsed)
+
+
+_MULTIPART_FILE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
                 }
-                for m in parsed.medicines
-            ],
+            }
         },
-    }
\ No newline at end of file
+    }
+}
+
+
+@router.post("/order", openapi_extra=_MULTIPART_FILE_BODY)
+async def voice_order(request: Request):
+    """
+    Multipart upload (field "file"). The body is parsed as it arrives, so
+    an oversized upload is refused once it passes the limit rather than
+    after it was spooled. The file part is spooled to a temporary file and
+    read in bounded chunks for the STT worker. The STT slot is reserved
+    before the body is read, so a full queue refuses the upload up front.
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
+    try:
+        check_declared_size(request.headers.get("content-length"), VOICE_MAX_BYTES + MULTIPART_OVERHEAD)
+        stt_pool.reserve()
+    except UploadTooLarge as exc:
+        raise _too_large(exc)
+    except STTUnavailable as exc:
+        raise _stt_busy(exc)
+    try:
+        file = await multipart_file(request.headers, request.stream())
+    except UploadTooLarge as exc:
+        stt_pool.unreserve()
+        raise _too_large(exc)
+    except (MultiPartException, ValueError) as exc:
+        stt_pool.unreserve()
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:  # e.g. the client went away mid-upload
+        stt_pool.unreserve()
+        raise
+    try:
+        return await _transcribe_and_extract(upload_chunks(file), reserved=True)
+    finally:
+        await file.close()
+
+
+@router.post("/order/stream")
+async def voice_order_stream(request: Request):
+    """
+    Raw audio as the request body (any content type). The body is received
+    in bounded chunks, nothing is spooled, and a full STT queue refuses the
+    request before any of it is read. Transcription starts once the whole
+    clip is in; the websocket route is the one that transcribes as audio
+    arrives.
+    """
+    try:
+        check_declared_size(request.headers.get("content-length"))
+        stt_pool.check_capacity()
+    except UploadTooLarge as exc:
+        raise _too_large(exc)
+    except STTUnavailable as exc:
+        raise _stt_busy(exc)
+    return await _transcribe_and_extract(request.stream())
+
+
+async def _ws_frames(ws: WebSocket) -> AsyncIterator[bytes]:
+    """
+    Binary frames are audio; a text frame "end" closes the utterance.
+    """
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes") is not None:
+            yield message["bytes"]
+        elif message.get("text") == "end":
+            return
+
+
+def _medicine_key(medicines: List[MedicineRequest]) -> Tuple:
+    return tuple((m.name, m.dosage, m.quantity) for m in medicines)
+
+
+@router.websocket("/stream")
+async def voice_stream(ws: WebSocket):
+    """
+    Streaming voice order. The client sends audio as binary frames and the
+    text frame "end" when done. The server replies with JSON messages:
+
+    - {"type": "partial", "transcript", "stable"} per transcript update
+    - {"type": "medicines", "transcript", "medicines"} whenever rule-based
+      extraction of the stable transcript gives a different medicine list
+    - {"type": "final", "transcript", "parsed"} with the full extraction
+      (LLM fallback included), after which the socket is closed
+    - {"type": "error", "detail"} before closing on bad or oversized audio
+    """
+    await ws.accept()
+    stable = ""
+    last_key: Tuple = ()
+    try:
+        async for transcript in transcribe_stream(audio_stream(_ws_frames(ws))):
+            if transcript.final:
+                break
+            await ws.send_json({"type": "partial", "transcript": transcript.text, "stable": transcript.stable})
+            if transcript.stable == stable:
+                continue
+            # Partial results are rule-based only: no LLM calls per segment
+            stable = transcript.stable
+            parsed = await asyncio.to_thread(extract_order_rule_based, stable)
+            key = _medicine_key(parsed.medicines)
+            if key != last_key:
+                last_key = key
+                await ws.send_json(
+                    {"type": "medicines", "transcript": stable, "medicines": _medicines_out(parsed.medicines)}
+                )
+
+        if not transcript.text:
+            await ws.send_json({"type": "error", "detail": "Could not transcribe audio"})
+            await ws.close()
+            return
+        parsed = await extract_order_async(transcript.text)
+        await ws.send_json({"type": "final", **_voice_response(transcript.text, parsed)})
+        await ws.close()
+    except UploadTooLarge as exc:
+        await ws.send_json({"type": "error", "detail": _too_large(exc).detail})
+        await ws.close(code=1009)
+    except UnicodeDecodeError:
+        await ws.send_json({"type": "error", "detail": "Could not transcribe audio"})
+        await ws.close(code=1003)
+    except WebSocketDisconnect:
+        pass
+
+
+def _audio_response(text: str, voice: str, audio_format: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_speech(text, voice, audio_format),
+        media_type=FORMATS[audio_format],
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/tts")
+async def speak(req: SpeakRequest) -> StreamingResponse:
+    """
+    Stream speech for `text`, segment by segment as it is synthesized
+    (cached segments are sent immediately).
+    """
+    return _audio_response(req.text, req.voice, req.format)
+
+
+@router.post("/confirm")
+async def confirm_order(req: ConfirmRequest) -> StreamingResponse:
+    """
+    Parse an order and read it back. The spoken text is in the
+    X-Confirmation-Text header (percent-encoded).
+    """
+    parsed = await extract_order_async(req.message)
+    text = confirmation_text(parsed.medicines)
+    response = _audio_response(text, req.voice, req.format)
+    response.headers["X-Confirmation-Text"] = quote(text)
+    return response
@@ -0,0 +1,92 @@
+"""
+Scaling benchmark for dosage/quantity extraction.
+
+Times the per-medicine window extractors (extract_dosage + extract_quantity
+for every medicine) against the single-pass annotator (extract_details)
+for growing numbers of medicines and amounts of filler text, so the
+medicines x patterns x text cost of the former shows next to the linear
+cost of the latter.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.annotate_scaling --medicines 1 4 16 64 --filler 0 200
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from extractor.annotate import extract_details
+from extractor.dosage import extract_dosage
+from extractor.medicine import _load_medicine_names
+from extractor.preprocess import normalize_text
+from extractor.quantity import extract_quantity
+
+from .corpus import CHATTER
+
+LINES = [
+    "{qty} strips of {name} 500 mg twice daily for 5 days",
+    "{name} {qty} packs once a day at night",
+    "{qty} boxes {name} tablets every 8 hours",
+    "{name} drops x 2 weeks",
+]
+
+
+def order_text(n_medicines: int, filler_words: int, seed: int = 0) -> Tuple[str, List[str]]:
+    """
+    (normalized order text, medicine phrases) with `filler_words` words of
+    chatter spread between the medicine lines.
+    """
+    rng = random.Random(seed)
+    catalog = list(_load_medicine_names())
+    names = [rng.choice(catalog) for _ in range(n_medicines)]
+    filler = " ".join(rng.choice(CHATTER) for _ in range(filler_words)).split()[:filler_words]
+    per_gap = len(filler) // max(1, n_medicines)
+
+    parts: List[str] = []
+    for i, name in enumerate(names):
+        parts.append(rng.choice(LINES).format(name=name, qty=rng.randint(1, 5)))
+        parts.append(" ".join(filler[i * per_gap : (i + 1) * per_gap]))
+    return normalize_text(" and ".join(p for p in parts if p)), names
+
+
+def _legacy(text: str, phrases: List[str]) -> None:
+    for phrase in phrases:
+        extract_dosage(text, phrase)
+        extract_quantity(text, phrase)
+
+
+def _time(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def run(medicine_counts: List[int], filler_counts: List[int], repeat: int) -> None:
+    print(f"{'medicines':>9} {'filler':>7} {'chars':>7} {'windows ms':>11} {'annotate ms':>12} {'speedup':>8}")
+    for filler in filler_counts:
+        for n in medicine_counts:
+            text, phrases = order_text(n, filler)
+            _legacy(text, phrases)  # warm the normalizer caches both sides use
+            extract_details(text, phrases)
+            legacy_ms = _time(lambda: _legacy(text, phrases), repeat)
+            annotate_ms = _time(lambda: extract_details(text, phrases), repeat)
+            print(
+                f"{n:>9} {filler:>7} {len(text):>7} {legacy_ms:>11.3f} {annotate_ms:>12.3f} "
+                f"{legacy_ms / annotate_ms:>7.1f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--medicines", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--filler", type=int, nargs="+", default=[0, 200])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.medicines, args.filler, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
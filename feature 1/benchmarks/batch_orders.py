@@ -0,0 +1,71 @@
+"""
+Batch endpoint benchmark: N sequential POST /chat/order calls versus one
+POST /chat/orders/batch call with the same N messages.
+
+The LLM fallback is replaced by a fixed-latency stub (--llm-ms) so the
+numbers do not depend on a running Ollama.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.batch_orders --n 200 --llm-ms 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi.testclient import TestClient
+
+import extractor
+from main import app
+
+from .catalog_scaling import SAMPLE_MESSAGES
+
+
+def _stub_llm(latency_s: float):
+    async def llm_extract_order_async(user_text: str):
+        await asyncio.sleep(latency_s)
+        return {"medicines": []}
+
+    return llm_extract_order_async
+
+
+def run(n: int, llm_ms: float) -> None:
+    extractor.llm_extract_order_async = _stub_llm(llm_ms / 1000.0)
+    rng = random.Random(0)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(n)]
+
+    with TestClient(app) as client:
+        # Warm up catalog caches and the worker pool
+        client.post("/chat/order", json={"message": messages[0]})
+        client.post("/chat/orders/batch", json={"messages": messages[:1]})
+
+        t0 = time.perf_counter()
+        sequential = [client.post("/chat/order", json={"message": m}).json() for m in messages]
+        seq_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = client.post("/chat/orders/batch", json={"messages": messages}).json()["results"]
+        batch_s = time.perf_counter() - t0
+
+    for single, item in zip(sequential, batch):
+        if item["error"] or item["result"]["medicines"] != single["medicines"]:
+            raise SystemExit(f"batch result differs from single call: {item}")
+
+    print(f"messages: {n}, stub LLM latency: {llm_ms} ms")
+    print(f"sequential: {seq_s * 1000:9.1f} ms ({seq_s * 1000 / n:.2f} ms/msg)")
+    print(f"batch:      {batch_s * 1000:9.1f} ms ({batch_s * 1000 / n:.2f} ms/msg)")
+    print(f"speedup:    {seq_s / batch_s:9.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    run(args.n, args.llm_ms)
+
+
+if __name__ == "__main__":
+    main()
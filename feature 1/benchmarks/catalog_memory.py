@@ -0,0 +1,65 @@
+"""
+Memory benchmark for the catalog representation: one Product dict per row
+versus the columnar store, on a synthetic catalog with realistic
+descriptions.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.catalog_memory --rows 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from extractor.catalog import PRODUCTS_CSV, _parse_products
+from extractor.catalog_store import ColumnarCatalog, compile_rows
+
+
+def synthetic_rows(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(PRODUCTS_CSV, encoding="utf-8") as f:
+        base = _parse_products(f.read())
+    for i in range(n):
+        row = dict(rng.choice(base))
+        row["product_id"] = str(1_000_000 + i)
+        row["pzn"] = f"{rng.randrange(10**8):08d}"
+        row["name"] = f'{row["name"]} {i}'
+        row["description"] = f'{row["description"]} Charge {i}.'
+        yield row
+
+
+def _measure(build):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size, elapsed
+
+
+def run(n: int) -> None:
+    rows, dict_bytes, dict_s = _measure(lambda: list(synthetic_rows(n)))
+    blob = compile_rows(rows, "bench")
+    del rows
+
+    store, col_bytes, col_s = _measure(lambda: ColumnarCatalog(blob))
+
+    print(f"rows: {n}")
+    print(f"dict rows:  {dict_bytes / 2**20:8.1f} MiB  (build {dict_s * 1000:.0f} ms)")
+    print(f"artifact:   {len(blob) / 2**20:8.1f} MiB  (shared page cache when mmapped)")
+    print(f"columnar:   {col_bytes / 2**20:8.3f} MiB private  (open {col_s * 1000:.2f} ms)")
+    print(f"sample row: {store.row(n // 2)['name']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Catalog-size scaling benchmark for extract_medicines matching.
+
+Compares the original full scan (first-character pre-filter + extractOne over
+the catalog for every n-gram) with the NameIndex shortlist, checks that both
+return identical matches, and prints timings per catalog size.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.catalog_scaling --sizes 52 1000 10000 50000
+"""
+
+import argparse
+import random
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from rapidfuzz import fuzz, process
+
+from extractor import catalog
+from extractor.catalog_store import ColumnarCatalog, compile_rows
+from extractor.medicine import (
+    FUZZY_THRESHOLD,
+    _generate_ngrams,
+    _load_medicine_names,
+    _match_ngrams,
+)
+from extractor.name_index import NameIndex
+from extractor.preprocess import normalize_text
+
+SAMPLE_MESSAGES = [
+    "i need 2 strips of paracetamol apodiscounter 500 mg tabletten twice a day for 5 days",
+    "norsan omega 3 kapseln 1 pack and vitasprint b12 kapseln",
+    "please send prostata men kapseln and sinupret saft for my son",
+    "cetirizin hexal tropfen 10 ml once daily at night",
+    "two boxes of magnesium verla and one vigantolvit 2000 i.e. vitamin d3",
+]
+
+
+def _scan_ngrams(ngrams: List[str], names: List[str]) -> List[Tuple[str, str, float]]:
+    """The pre-index implementation, kept here as the reference."""
+    found: List[Tuple[str, str, float]] = []
+    for phrase in ngrams:
+        first = phrase[0]
+        candidates = [n for n in names if n and n[0] == first] or names
+        match = process.extractOne(phrase, candidates, scorer=fuzz.ratio)
+        if not match:
+            continue
+        canonical_name, score, _ = match
+        if score >= FUZZY_THRESHOLD:
+            found.append((canonical_name, phrase, score))
+    return found
+
+
+def _mutate(word: str, rng: random.Random) -> str:
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word))
+    op = rng.random()
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    if op < 0.4:
+        return word[:i] + letter + word[i + 1 :]
+    if op < 0.7:
+        return word[:i] + letter + word[i:]
+    return word[:i] + word[i + 1 :]
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> List[str]:
+    """
+    Real normalized names first, then mutated/recombined variants of them
+    until `size` entries exist.
+    """
+    rng = random.Random(seed)
+    base = list(_load_medicine_names())
+    words = sorted({w for n in base for w in n.split()})
+    names = list(base[:size])
+    while len(names) < size:
+        template = rng.choice(base).split()
+        n_words = rng.randint(1, len(template))
+        picked = [_mutate(w, rng) if rng.random() < 0.5 else w for w in template[:n_words]]
+        if rng.random() < 0.5:
+            picked.append(rng.choice(words))
+        if rng.random() < 0.3:
+            picked.append(f"{rng.choice([5, 10, 20, 50, 100, 200, 400, 500, 1000])} mg")
+        names.append(" ".join(picked))
+    return names
+
+
+def synthetic_rows(names: List[str], seed: int = 0) -> List[Dict[str, object]]:
+    """
+    Product rows for synthetic_catalog(): the live rows first, then a copy
+    of a random live row per synthetic name with its own id and PZN.
+    """
+    rng = random.Random(seed)
+    live = list(catalog.current_catalog().products)
+    rows = live[: len(names)]
+    for i in range(len(rows), len(names)):
+        row = dict(rng.choice(live))
+        row["product_id"] = f"syn{i}"
+        row["pzn"] = f"{90_000_000 + i:08d}"
+        row["name"] = names[i]
+        rows.append(row)
+    for row in rows:
+        row.setdefault("description", "")  # rows are materialized without it
+    return rows
+
+
+@contextmanager
+def synthetic_snapshot(size: int) -> Iterator[List[str]]:
+    """
+    Temporarily serve the whole pipeline (matching, product lookups, hash
+    indexes) from a synthetic catalog of `size` names. The snapshot has its
+    own version, so version-keyed caches never mix it up with the live one.
+    """
+    live = catalog.current_catalog()
+    names = synthetic_catalog(size)
+    version = f"syn{size}-{live.version}"[:16]
+    store = ColumnarCatalog(compile_rows(synthetic_rows(names), version))
+    catalog._swap(catalog.snapshot_from_store(store, "synthetic", live.source_mtime))
+    try:
+        yield names
+    finally:
+        catalog._swap(live)
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    ngram_sets = [_generate_ngrams(normalize_text(m).split(), max_n=3) for m in SAMPLE_MESSAGES]
+
+    print(f"{'catalog':>9} {'build ms':>9} {'scan ms/msg':>12} {'index ms/msg':>13} {'speedup':>8} {'shortlist':>10}")
+    for size in sizes:
+        names = synthetic_catalog(size)
+
+        t0 = time.perf_counter()
+        index = NameIndex(names)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        for ngrams in ngram_sets:
+            expected = _scan_ngrams(ngrams, names)
+            got = _match_ngrams(ngrams, index)
+            if expected != got:
+                raise SystemExit(f"mismatch at catalog size {size}: {expected} != {got}")
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for ngrams in ngram_sets:
+                _scan_ngrams(ngrams, names)
+        scan_ms = (time.perf_counter() - t0) * 1000 / (repeat * len(ngram_sets))
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for ngrams in ngram_sets:
+                _match_ngrams(ngrams, index)
+        index_ms = (time.perf_counter() - t0) * 1000 / (repeat * len(ngram_sets))
+
+        phrases = [p for ngrams in ngram_sets for p in ngrams]
+        avg_short = sum(len(index.shortlist(p, FUZZY_THRESHOLD)) for p in phrases) / len(phrases)
+
+        print(
+            f"{size:>9} {build_ms:>9.1f} {scan_ms:>12.2f} {index_ms:>13.2f} "
+            f"{scan_ms / index_ms:>7.1f}x {avg_short:>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[52, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Synthetic order corpus for the pipeline benchmark.
+
+Orders are built from products-export.csv (every catalog product) and
+Consumer Order History 1.csv (real product / quantity / frequency
+combinations), with typos in product names, English, German and
+romanized Hindi phrasing, one to three medicines per order and optional
+chatter to vary the length. Each order carries the products and
+quantities it was built from, so accuracy can be scored next to latency.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from extractor.catalog import current_catalog
+from extractor.history import load_history
+from extractor.preprocess import normalize_text
+
+from .catalog_scaling import _mutate
+
+TEMPLATES = {
+    "en": (["i need {items}", "please send {items}", "can i get {items} thanks", "{items}"], " and "),
+    "de": (["ich brauche {items} bitte", "bitte {items}", "hallo ich mochte {items}"], " und "),
+    "hi": (["mujhe {items} chahiye", "{items} bhej do", "bhaiya {items} de dijiye"], " aur "),
+}
+UNITS = {
+    "en": ["", "pack of", "packs of", "boxes of", "strips of"],
+    "de": ["", "packungen", "packung"],
+    "hi": ["", "pack", "dabba"],
+}
+FREQUENCIES = {
+    "once daily": {"en": "once a day", "de": "einmal am tag", "hi": "din mein ek baar"},
+    "twice daily": {"en": "twice daily", "de": "zweimal am tag", "hi": "din mein do baar"},
+    "three times daily": {"en": "3 times a day", "de": "dreimal am tag", "hi": "din mein teen baar"},
+    "as needed": {"en": "when needed", "de": "bei bedarf", "hi": "zarurat par"},
+}
+NUMBER_WORDS = {1: "one", 2: "two", 3: "three", 4: "four", 5: "five"}
+CHATTER = [
+    "hello good morning",
+    "my doctor told me to order this",
+    "it is for my mother",
+    "delivery to the usual address",
+    "the last order was fine",
+]
+
+
+@dataclass
+class ExpectedMedicine:
+    name: str                   # normalize_text() of the catalog name
+    quantity: int
+    frequency: Optional[str]    # history value, lowercased
+
+
+@dataclass
+class Order:
+    text: str
+    language: str
+    typos: int
+    medicines: List[ExpectedMedicine] = field(default_factory=list)
+
+
+def _sources() -> List[Tuple[str, int, Optional[str]]]:
+    """
+    (raw product name, quantity, frequency): history rows first, then every
+    catalog product with quantity 0 (picked per order).
+    """
+    rows = [
+        (r["product_name"], max(1, r["quantity"]), r["dosage_frequency"].lower() or None)
+        for rows in load_history().values()
+        for r in rows
+    ]
+    rows += [(name, 0, None) for name in current_catalog().names]
+    return rows
+
+
+def _typo_name(name: str, rate: float, rng: random.Random) -> Tuple[str, int]:
+    words = []
+    typos = 0
+    for w in name.split():
+        if w.isalpha() and len(w) >= 5 and rng.random() < rate:
+            w = _mutate(w, rng)
+            typos += 1
+        words.append(w)
+    return " ".join(words), typos
+
+
+def order_corpus(
+    n: int,
+    seed: int = 0,
+    typo_rate: float = 0.15,
+    mixed_rate: float = 0.3,
+    max_medicines: int = 3,
+    max_chatter: int = 2,
+) -> List[Order]:
+    """
+    `n` orders. `mixed_rate` of them use German or Hindi phrasing around
+    the (unchanged, possibly misspelled) product names.
+    """
+    rng = random.Random(seed)
+    sources = _sources()
+    orders: List[Order] = []
+    for _ in range(n):
+        lang = rng.choice(["de", "hi"]) if rng.random() < mixed_rate else "en"
+        templates, joiner = TEMPLATES[lang]
+
+        picked = rng.sample(sources, rng.randint(1, max_medicines))
+        seen = set()
+        items, expected, typos = [], [], 0
+        for raw_name, qty, freq in picked:
+            canonical = normalize_text(raw_name)
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            typed, n_typos = _typo_name(raw_name, typo_rate, rng)
+            typos += n_typos
+            qty = qty or rng.randint(1, 4)
+
+            qty_text = NUMBER_WORDS[qty] if lang == "en" and qty in NUMBER_WORDS and rng.random() < 0.3 else str(qty)
+            unit = rng.choice(UNITS[lang])
+            item = " ".join(p for p in (qty_text, unit, typed) if p)
+            if freq in FREQUENCIES:
+                item += " " + FREQUENCIES[freq][lang]
+            items.append(item)
+            expected.append(ExpectedMedicine(canonical, qty, freq))
+
+        text = rng.choice(templates).format(items=joiner.join(items))
+        chatter = rng.sample(CHATTER, rng.randint(0, max_chatter))
+        if chatter:
+            text = ". ".join(chatter + [text])
+        orders.append(Order(text=text, language=lang, typos=typos, medicines=expected))
+    return orders
@@ -0,0 +1,65 @@
+"""
+Message-length benchmark for the extract_medicines matching modes.
+
+Builds long prescription-like texts (many pasted lines) and times the
+per-phrase "index" loop against the vectorized "cdist" mode, checking that
+both return the same medicines.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.phrase_scoring --catalog 10000 --lines 1 5 20 80
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from extractor.medicine import _best_phrase_per_name, _extract_cdist, _generate_ngrams, _match_ngrams
+from extractor.name_index import NameIndex
+from extractor.preprocess import normalize_text
+
+from .catalog_scaling import SAMPLE_MESSAGES, synthetic_catalog
+
+
+def prescription(lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(rng.choice(SAMPLE_MESSAGES) for _ in range(lines))
+
+
+def run(catalog_size: int, line_counts: List[int], repeat: int) -> None:
+    index = NameIndex(synthetic_catalog(catalog_size))
+
+    print(f"catalog size: {catalog_size}")
+    print(f"{'lines':>6} {'ngrams':>7} {'index ms':>9} {'cdist ms':>9} {'speedup':>8}")
+    for lines in line_counts:
+        ngrams = _generate_ngrams(normalize_text(prescription(lines)).split(), max_n=3)
+
+        expected = _best_phrase_per_name(_match_ngrams(ngrams, index))
+        if _extract_cdist(ngrams, index) != expected:
+            raise SystemExit(f"mismatch at {lines} lines")
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            _best_phrase_per_name(_match_ngrams(ngrams, index))
+        index_ms = (time.perf_counter() - t0) * 1000 / repeat
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            _extract_cdist(ngrams, index)
+        cdist_ms = (time.perf_counter() - t0) * 1000 / repeat
+
+        print(f"{lines:>6} {len(ngrams):>7} {index_ms:>9.2f} {cdist_ms:>9.2f} {index_ms / cdist_ms:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--catalog", type=int, default=10000)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 5, 20, 80])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.catalog, args.lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Per-stage benchmark of extract_order with accuracy and regression gates.
+
+Runs the synthetic order corpus (benchmarks.corpus) through every stage of
+the rule-based pipeline and through the full extract_order with a stubbed
+LLM (--llm-ms fixed latency), on the live catalog and on synthetic
+catalogs scaled to --sizes. Per stage it reports p50 / p95 latency per
+order; for the full pipeline it also reports medicine recall and
+precision and quantity accuracy.
+
+With --check the run is compared with the stored baseline and the script
+exits with status 1 if a stage's p50 regressed by more than --tolerance
+(and --min-ms) or an accuracy figure dropped by more than --accuracy-drop.
+Baseline numbers are machine specific; refresh them with --save-baseline
+on the machine that runs the check.
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.pipeline --orders 300 --sizes 0 10000 100000
+    python -m benchmarks.pipeline --check
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import extractor
+from extractor import medicine
+from extractor.annotate import extract_details
+from extractor.dosage import extract_dosage
+from extractor.medicine import extract_medicines
+from extractor.preprocess import normalize_text
+from extractor.product_index import find_product_by_name
+from extractor.quantity import extract_quantity
+
+from .catalog_scaling import synthetic_snapshot
+from .corpus import Order, order_corpus
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+STAGES = [
+    "normalize_text",
+    "extract_medicines",
+    "extract_dosage",
+    "extract_quantity",
+    "annotate",
+    "product_lookup",
+    "pipeline",
+]
+
+
+def _stub_llm(latency_s: float) -> None:
+    def llm_extract_order(user_text: str, timeout: Optional[float] = None):
+        time.sleep(latency_s)
+        return {"medicines": []}
+
+    def llm_fill_spans(spans, timeout: Optional[float] = None):
+        time.sleep(latency_s)
+        return {"items": []}
+
+    extractor.llm_extract_order = llm_extract_order
+    extractor.llm_fill_spans = llm_fill_spans
+
+
+def _timed(fn: Callable[[], object], into: List[float]) -> object:
+    t0 = time.perf_counter()
+    result = fn()
+    into.append((time.perf_counter() - t0) * 1000)
+    return result
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _accuracy(orders: List[Order], results) -> Dict[str, float]:
+    expected_total = found_total = matched = qty_ok = 0
+    for order, parsed in zip(orders, results):
+        found = {m.name: m for m in parsed.medicines}
+        expected_total += len(order.medicines)
+        found_total += len(found)
+        for exp in order.medicines:
+            med = found.get(exp.name)
+            if med is None:
+                continue
+            matched += 1
+            qty_ok += med.quantity == exp.quantity
+    return {
+        "medicine_recall": matched / expected_total if expected_total else 0.0,
+        "medicine_precision": matched / found_total if found_total else 0.0,
+        "quantity_accuracy": qty_ok / matched if matched else 0.0,
+    }
+
+
+@contextmanager
+def _phrase_memo_disabled() -> Iterator[None]:
+    """
+    Score every n-gram: with the memo on, the repeats (and the pipeline run
+    after the extract_medicines stage) would time memo hits instead.
+    """
+    size = medicine.PHRASE_MEMO_SIZE
+    medicine.PHRASE_MEMO_SIZE = 0
+    medicine.phrase_memo.clear()
+    try:
+        yield
+    finally:
+        medicine.PHRASE_MEMO_SIZE = size
+
+
+def measure(orders: List[Order], repeat: int = 3) -> Dict[str, object]:
+    """
+    Per-order time of each stage is the best of `repeat` runs, which keeps
+    scheduler noise out of the percentiles. The phrase memo is off.
+    """
+    with _phrase_memo_disabled():
+        return _measure(orders, repeat)
+
+
+def _measure(orders: List[Order], repeat: int) -> Dict[str, object]:
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    results = []
+    for order in orders:
+        runs: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        for _ in range(repeat):
+            work = _timed(lambda: normalize_text(order.text), runs["normalize_text"])
+            meds = _timed(lambda: extract_medicines(work), runs["extract_medicines"])
+            _timed(lambda: [extract_dosage(work, c) for c, _ in meds], runs["extract_dosage"])
+            _timed(lambda: [extract_quantity(work, c) for c, _ in meds], runs["extract_quantity"])
+            _timed(lambda: extract_details(work, [p for _, p in meds]), runs["annotate"])
+            _timed(lambda: [find_product_by_name(c) for c, _ in meds], runs["product_lookup"])
+            parsed = _timed(lambda: extractor.extract_order(order.text), runs["pipeline"])
+        results.append(parsed)
+        for stage, values in runs.items():
+            timings[stage].append(min(values))
+
+    return {
+        "orders": len(orders),
+        "stages": {
+            stage: {
+                "p50_ms": round(statistics.median(values), 4),
+                "p95_ms": round(_percentile(values, 0.95), 4),
+            }
+            for stage, values in timings.items()
+        },
+        "accuracy": {k: round(v, 4) for k, v in _accuracy(orders, results).items()},
+    }
+
+
+def run(sizes: List[int], n_orders: int, seed: int, repeat: int) -> Dict[str, Dict[str, object]]:
+    orders = order_corpus(n_orders, seed=seed)
+    report: Dict[str, Dict[str, object]] = {}
+    for size in sizes:
+        key = "live" if size == 0 else str(size)
+        if size == 0:
+            measure(orders[:10], 1)  # warm-up
+            report[key] = measure(orders, repeat)
+        else:
+            with synthetic_snapshot(size):
+                measure(orders[:10], 1)
+                report[key] = measure(orders, repeat)
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, object]]) -> None:
+    for key, result in report.items():
+        print(f"catalog: {key} ({result['orders']} orders)")
+        print(f"  {'stage':<18} {'p50 ms':>9} {'p95 ms':>9}")
+        for stage, t in result["stages"].items():
+            print(f"  {stage:<18} {t['p50_ms']:>9.3f} {t['p95_ms']:>9.3f}")
+        for name, value in result["accuracy"].items():
+            print(f"  {name:<18} {value:>9.1%}")
+
+
+def regressions(
+    report: Dict[str, Dict[str, object]],
+    baseline: Dict[str, Dict[str, object]],
+    tolerance: float,
+    min_ms: float,
+    accuracy_drop: float,
+) -> List[str]:
+    problems: List[str] = []
+    for key, result in report.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for stage, t in result["stages"].items():
+            ref = base["stages"].get(stage)
+            if ref is None:
+                continue
+            cur, old = t["p50_ms"], ref["p50_ms"]
+            if cur > old * (1 + tolerance) and cur - old > min_ms:
+                problems.append(f"{key}/{stage}: p50 {old:.3f} -> {cur:.3f} ms")
+        for name, value in result["accuracy"].items():
+            old = base["accuracy"].get(name)
+            if old is not None and value < old - accuracy_drop:
+                problems.append(f"{key}/{name}: {old:.1%} -> {value:.1%}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 10000], help="0 = live catalog")
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per order; the fastest counts")
+    parser.add_argument("--llm-ms", type=float, default=0.0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative p50 increase")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore p50 increases below this")
+    parser.add_argument("--accuracy-drop", type=float, default=0.01)
+    args = parser.parse_args()
+
+    _stub_llm(args.llm_ms / 1000.0)
+    report = run(args.sizes, args.orders, args.seed, args.repeat)
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = regressions(report, baseline, args.tolerance, args.min_ms, args.accuracy_drop)
+        if problems:
+            print("REGRESSIONS:")
+            for p in problems:
+                print("  " + p)
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Misspelling benchmark for the catalog token typo index.
+
+Builds orders around catalog names (clean and with `--typos` edits per long word)
+and compares extract_medicines with and without spell correction: recall of
+the intended product, precision of the reported products, extra products
+reported, and time per message. With
+--sizes the live snapshot is temporarily replaced by a synthetic catalog of
+that size (real names first, see catalog_scaling.synthetic_catalog).
+
+Run from the `feature 1` directory:
+
+    python -m benchmarks.typo_recall --sizes 52 10000
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from extractor import catalog
+from extractor.medicine import extract_medicines
+
+from .catalog_scaling import _mutate, synthetic_snapshot
+from .pipeline import _phrase_memo_disabled
+
+TEMPLATES = [
+    "i need {name} please",
+    "2 packs of {name} twice a day",
+    "can you send {name} and some water",
+    "{name} 1 box",
+]
+
+
+def _typo(word: str, edits: int, rng: random.Random) -> str:
+    if not word.isalpha() or len(word) < 5:
+        return word
+    for _ in range(edits):
+        word = _mutate(word, rng)
+    return word
+
+
+def orders(names: List[str], edits: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    (message, expected canonical) per template for every name short enough
+    to be matched by the 3-word n-grams.
+    """
+    rng = random.Random(seed)
+    out = []
+    for name in names:
+        words = name.split()
+        if len(words) > 3:
+            continue
+        for template in TEMPLATES:
+            typed = " ".join(_typo(w, edits, rng) for w in words)
+            out.append((template.format(name=typed), name))
+    return out
+
+
+def evaluate(cases: List[Tuple[str, str]], correct: bool, repeat: int) -> Tuple[float, float, int, float]:
+    hits = extra = 0
+    for message, expected in cases:
+        found = [c for c, _ in extract_medicines(message, mode="index", correct=correct)]
+        hits += expected in found
+        extra += sum(1 for c in found if c != expected)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for message, _ in cases:
+            extract_medicines(message, mode="index", correct=correct)
+    ms = (time.perf_counter() - t0) * 1000 / (repeat * len(cases))
+    reported = hits + extra
+    return hits / len(cases), hits / reported if reported else 0.0, extra, ms
+
+
+def run(sizes: List[int], edits: int, repeat: int) -> None:
+    real = catalog.current_catalog().medicine_names
+    print(f"{'catalog':>8} {'orders':>7} {'correct':>8} {'recall':>7} {'precision':>9} {'extra':>6} {'ms/msg':>7}")
+    for size in sizes:
+        with synthetic_snapshot(size), _phrase_memo_disabled():
+            for label, n_edits in (("clean", 0), ("typos", edits)):
+                cases = orders(real, n_edits)
+                for correct in (False, True):
+                    recall, precision, extra, ms = evaluate(cases, correct, repeat)
+                    print(
+                        f"{size:>8} {label:>7} {str(correct):>8} {recall:>7.1%} {precision:>9.1%} "
+                        f"{extra:>6} {ms:>7.2f}"
+                    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[52, 10000])
+    parser.add_argument("--typos", type=int, default=2, help="edits per word of 5+ letters")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.typos, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
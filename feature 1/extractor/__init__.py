@@ -1,13 +1,37 @@
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 
+import httpx
+from rapidfuzz import fuzz
+
+from .catalog import CatalogSnapshot, current_catalog
 from .preprocess import normalize_text
-from .language import detect_language, translate_to_english
+from .language import SupportedLanguage, detect_language, translate_to_english
 from .medicine import extract_medicines
-from .dosage import extract_dosage
-from .quantity import extract_quantity
-from .llm_parser import llm_extract_order
-from .product_index import find_product_by_name, find_best_product_for_name
+from .annotate import extract_details
+from .llm_parser import (
+    LLM_BUDGET_S,
+    llm_breaker,
+    llm_extract_order,
+    llm_extract_order_async,
+    llm_fill_spans,
+    llm_fill_spans_async,
+    llm_stream_medicines,
+)
+from .confidence import build_spans, field_confidence, merge_span_result
+from .log import debug, get_logger, tracing
+from .metrics import record_order, timed
+from .product_index import (
+    find_best_product_for_name,
+    find_product_by_id,
+    find_product_by_name,
+    find_product_by_pzn,
+)
+
+
+log = get_logger(__name__)
 
 
 @dataclass
@@ -21,6 +45,7 @@ class MedicineRequest:
     pzn: Optional[str] = None
     price_rec: Optional[float] = None
     package_size: Optional[str] = None
+    confidence: Optional[Dict[str, float]] = None  # per field, 0..1
 
 
 @dataclass
@@ -31,161 +56,354 @@ class ParsedOrder:
     translated_text: str
     medicines: List[MedicineRequest]
     meta: Dict
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage, see metrics
 
 
-def _is_low_confidence(parsed: ParsedOrder) -> bool:
+def _medicine_from_llm(m: Dict[str, Any]) -> MedicineRequest:
     """
-    Heuristic: call LLM if we found no medicines, or if for all medicines
-    we lack either dosage or quantity or any duration/frequency.
+    Turn one LLM medicine dict into a MedicineRequest:
+    - Take m["canonical_name"] (whatever the model says)
+    - Fuzzy-match it directly against all product names from products-export.csv
+    - Use that product row (if good enough match) to fill product_id, pzn, etc.
     """
-    if not parsed.medicines:
-        return True
-
-    for m in parsed.medicines:
-        has_dosage = bool(m.dosage)
-        has_quantity = m.quantity is not None
-        has_details = bool(
-            m.dosage_details
-            and (
-                m.dosage_details.get("frequency")
-                or m.dosage_details.get("duration")
-            )
-        )
+    raw_name = m.get("raw_name") or ""
+    canonical = m.get("canonical_name") or raw_name  # name from LLM
+    strength = m.get("strength")
+    form = m.get("form")
+    frequency = m.get("frequency")
+    duration = m.get("duration")
+    quantity = m.get("quantity")
 
-        if has_dosage and has_quantity and has_details:
-            return False
+    # Build dosage string from LLM fields
+    parts: List[str] = []
+    if strength:
+        parts.append(str(strength))
+    if form:
+        parts.append(str(form))
+    if frequency:
+        parts.append(str(frequency))
+    if duration:
+        parts.append(f"for {duration}")
+    dosage_str = " ".join(parts) if parts else None
 
-    return True
+    dosage_details = {
+        "raw": dosage_str,
+        "strength": strength,
+        "form": form,
+        "frequency": frequency,
+        "duration": duration,
+    }
+
+    # Directly match LLM name into CSV using fuzzy search
+    product = find_best_product_for_name(canonical)
+    catalog_name = product["name"] if product else canonical
+
+    if tracing():
+        debug(
+            log, "llm medicine",
+            canonical=canonical,
+            catalog_name=catalog_name,
+            product_id=product["product_id"] if product else None,
+        )
+
+    return MedicineRequest(
+        name=catalog_name,
+        matched_name=raw_name,
+        dosage=dosage_str,
+        quantity=quantity,
+        dosage_details=dosage_details,
+        product_id=product["product_id"] if product else None,
+        pzn=product["pzn"] if product else None,
+        price_rec=product["price_rec"] if product else None,
+        package_size=product["package_size"] if product else None,
+    )
 
 
 def _merge_llm_result(parsed: ParsedOrder, llm_data: Dict[str, Any]) -> ParsedOrder:
     """
     Replace parsed.medicines with LLM-derived medicines.
-
-    For each LLM medicine:
-    - Take m["canonical_name"] (whatever the model says)
-    - Fuzzy-match it directly against all product names from products-export.csv
-    - Use that product row (if good enough match) to fill product_id, pzn, etc.
     """
     llm_meds = llm_data.get("medicines", [])
     if not llm_meds:
         return parsed
 
-    new_meds: List[MedicineRequest] = []
-
-    for m in llm_meds:
-        raw_name = m.get("raw_name") or ""
-        canonical = m.get("canonical_name") or raw_name  # name from LLM
-        strength = m.get("strength")
-        form = m.get("form")
-        frequency = m.get("frequency")
-        duration = m.get("duration")
-        quantity = m.get("quantity")
-
-        # Build dosage string from LLM fields
-        parts: List[str] = []
-        if strength:
-            parts.append(str(strength))
-        if form:
-            parts.append(str(form))
-        if frequency:
-            parts.append(str(frequency))
-        if duration:
-            parts.append(f"for {duration}")
-        dosage_str = " ".join(parts) if parts else None
-
-        dosage_details = {
-            "raw": dosage_str,
-            "strength": strength,
-            "form": form,
-            "frequency": frequency,
-            "duration": duration,
-        }
-
-        # Directly match LLM name into CSV using fuzzy search
-        product = find_best_product_for_name(canonical)
-        catalog_name = product["name"] if product else canonical
-
-        # DEBUG
-        print(
-            "LLM DEBUG:",
-            "canonical=", repr(canonical),
-            "→ catalog_name=", repr(catalog_name),
-            "product=", product,
-        )
-
-        new_meds.append(
-            MedicineRequest(
-                name=catalog_name,
-                matched_name=raw_name,
-                dosage=dosage_str,
-                quantity=quantity,
-                dosage_details=dosage_details,
-                product_id=product["product_id"] if product else None,
-                pzn=product["pzn"] if product else None,
-                price_rec=product["price_rec"] if product else None,
-                package_size=product["package_size"] if product else None,
-            )
-        )
-
-    parsed.medicines = new_meds
+    parsed.medicines = [_medicine_from_llm(m) for m in llm_meds]
     return parsed
 
-def extract_order(text: str) -> ParsedOrder:
+def _rule_medicine(
+    canonical_name: str,
+    matched_phrase: str,
+    dosage_info: Optional[Dict[str, Any]],
+    qty: Optional[int],
+    timings: Dict[str, float],
+    snap: CatalogSnapshot,
+) -> MedicineRequest:
     """
-    Main entry point used by the FastAPI route.
+    MedicineRequest for a rule-based match: product lookup and confidence.
     """
-    original_text = text or ""
-    normalized = normalize_text(original_text)
+    dosage_str = dosage_info.get("raw") if dosage_info else None
 
-    lang = detect_language(original_text)
-    translated = translate_to_english(original_text, lang)
-    work_text = normalize_text(translated)
+    with timed(timings, "product_lookup"):
+        product = find_product_by_name(canonical_name, snap)
 
-    # 1) Rule-based extraction
-    meds = extract_medicines(work_text)  # [(canonical, matched_phrase)]
-    results: List[MedicineRequest] = []
+    if tracing():
+        debug(
+            log, "rule medicine",
+            canonical_name=canonical_name,
+            matched_phrase=matched_phrase,
+            product_id=product["product_id"] if product else None,
+        )
 
-    for canonical_name, matched_phrase in meds:
-        dosage_info = extract_dosage(work_text, canonical_name)
-        dosage_str = dosage_info.get("raw") if dosage_info else None
-        qty = extract_quantity(work_text, canonical_name)
+    med = MedicineRequest(
+        name=canonical_name,
+        matched_name=matched_phrase,
+        dosage=dosage_str,
+        quantity=qty,
+        dosage_details=dosage_info,
+        product_id=product["product_id"] if product else None,
+        pzn=product["pzn"] if product else None,
+        price_rec=product["price_rec"] if product else None,
+        package_size=product["package_size"] if product else None,
+    )
+    med.confidence = field_confidence(med, fuzz.ratio(matched_phrase, canonical_name))
+    return med
 
-        product = find_product_by_name(canonical_name)
 
-        # DEBUG
-        print(
-            "RULE DEBUG:",
-            "canonical_name=", repr(canonical_name),
-            "product=", product,
-        )
+def extract_order_rule_based(text: str, lang: Optional[SupportedLanguage] = None) -> ParsedOrder:
+    """
+    Rule-based part of extract_order: no network calls, safe to run in a
+    worker process. The whole parse runs against one catalog snapshot.
+    `lang` skips language detection when the caller already knows it.
+    """
+    original_text = text or ""
+    timings: Dict[str, float] = {}
+    with timed(timings, "preprocess"):
+        normalized = normalize_text(original_text)
+    snap = current_catalog()
 
-        results.append(
-            MedicineRequest(
-                name=canonical_name,
-                matched_name=matched_phrase,
-                dosage=dosage_str,
-                quantity=qty,
-                dosage_details=dosage_info,
-                product_id=product["product_id"] if product else None,
-                pzn=product["pzn"] if product else None,
-                price_rec=product["price_rec"] if product else None,
-                package_size=product["package_size"] if product else None,
-            )
-        )
+    with timed(timings, "language"):
+        if lang is None:
+            lang = detect_language(original_text)
+        translated = translate_to_english(original_text, lang, snap)
+    with timed(timings, "preprocess"):
+        work_text = normalize_text(translated)
 
-    parsed = ParsedOrder(
+    with timed(timings, "medicines"):
+        meds = extract_medicines(work_text, snap=snap)  # [(canonical, matched_phrase)]
+    # One annotation pass; each dosage/quantity span goes to the nearest mention
+    with timed(timings, "dosage_quantity"):
+        details = extract_details(work_text, [phrase for _, phrase in meds])
+    results = [
+        _rule_medicine(canonical_name, matched_phrase, dosage_info, qty, timings, snap)
+        for (canonical_name, matched_phrase), (dosage_info, qty) in zip(meds, details)
+    ]
+
+    return ParsedOrder(
         original_text=original_text,
         normalized_text=normalized,
         language=lang,
         translated_text=translated,
         medicines=results,
-        meta={},
+        meta={"catalog_version": snap.version},
+        timings=timings,
     )
 
-    # 2) LLM fallback (assumes Ollama is running)
-    if _is_low_confidence(parsed):
-        llm_data = llm_extract_order(original_text)
-        parsed = _merge_llm_result(parsed, llm_data)
 
-    return parsed
\ No newline at end of file
+def _plan_fallback(parsed: ParsedOrder) -> Tuple[Optional[str], List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Decide how much the LLM has to do:
+    - "full":    no medicines found, re-extract the whole order
+    - "partial": send only the spans of medicines with unresolved fields
+    - None:      rule-based result stands
+    """
+    if not parsed.medicines:
+        return "full", []
+    spans = build_spans(parsed.medicines, normalize_text(parsed.translated_text))
+    if spans:
+        return "partial", spans
+    return None, []
+
+
+def _llm_budget(budget_s: Optional[float]) -> float:
+    return LLM_BUDGET_S if budget_s is None else max(0.0, budget_s)
+
+
+def _degrade(parsed: ParsedOrder, status: str, exc: Optional[BaseException] = None) -> ParsedOrder:
+    """
+    Keep the rule-based result and record why the LLM did not contribute.
+    """
+    parsed.meta["llm_fallback"] = status
+    parsed.meta["degraded"] = True
+    if exc is not None:
+        parsed.meta["llm_error"] = f"{type(exc).__name__}: {exc}"
+    return parsed
+
+
+def _llm_failed(parsed: ParsedOrder, exc: BaseException) -> ParsedOrder:
+    # The request's own budget running out says nothing about Ollama's
+    # health (clients pick the budget), so it leaves the breaker alone
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return _degrade(parsed, "timeout", exc)
+    if isinstance(exc, httpx.TimeoutException):
+        llm_breaker.record_failure()
+        return _degrade(parsed, "timeout", exc)
+    if isinstance(exc, httpx.HTTPError):
+        llm_breaker.record_failure()
+        return _degrade(parsed, "error", exc)
+    # Unparseable model output; the call itself already counted as a success
+    return _degrade(parsed, "error", exc)
+
+
+def _apply_llm_data(
+    parsed: ParsedOrder,
+    mode: str,
+    spans: List[Tuple[int, Dict[str, Any]]],
+    llm_data: Dict[str, Any],
+) -> ParsedOrder:
+    # Breaker successes are recorded by llm_parser after real Ollama calls,
+    # so cache hits do not close a circuit that is probing a dead server
+    parsed.meta["llm_fallback"] = "ok"
+    parsed.meta["llm_mode"] = mode
+    with timed(parsed.timings, "merge"):
+        if mode == "full":
+            return _merge_llm_result(parsed, llm_data)
+        parsed.meta["llm_spans"] = len(spans)
+        parsed.meta["llm_fields_filled"] = merge_span_result(parsed.medicines, spans, llm_data)
+    return parsed
+
+
+def apply_llm_fallback(parsed: ParsedOrder, budget_s: Optional[float] = None) -> ParsedOrder:
+    """
+    LLM fallback (assumes Ollama is running); only called when the rules
+    left something unresolved. Bounded by the latency budget and guarded
+    by the circuit breaker.
+    """
+    mode, spans = _plan_fallback(parsed)
+    if mode is None:
+        return parsed
+    if not llm_breaker.allow():
+        return _degrade(parsed, "circuit_open")
+
+    budget = _llm_budget(budget_s)
+    if budget <= 0:
+        return _degrade(parsed, "timeout")
+    try:
+        with timed(parsed.timings, "llm"):
+            if mode == "full":
+                llm_data = llm_extract_order(parsed.original_text, timeout=budget)
+            else:
+                llm_data = llm_fill_spans([span for _, span in spans], timeout=budget)
+    except (TimeoutError, httpx.HTTPError, ValueError) as exc:
+        return _llm_failed(parsed, exc)
+
+    return _apply_llm_data(parsed, mode, spans, llm_data)
+
+
+async def apply_llm_fallback_async(parsed: ParsedOrder, budget_s: Optional[float] = None) -> ParsedOrder:
+    """
+    Async apply_llm_fallback: waits on the pooled Ollama client without
+    holding a threadpool thread, for at most `budget_s` seconds.
+    """
+    mode, spans = _plan_fallback(parsed)
+    if mode is None:
+        return parsed
+    if not llm_breaker.allow():
+        return _degrade(parsed, "circuit_open")
+
+    budget = _llm_budget(budget_s)
+    if budget <= 0:
+        return _degrade(parsed, "timeout")
+    try:
+        if mode == "full":
+            call = llm_extract_order_async(parsed.original_text)
+        else:
+            call = llm_fill_spans_async([span for _, span in spans])
+        with timed(parsed.timings, "llm"):
+            llm_data = await asyncio.wait_for(call, timeout=budget)
+    except (asyncio.TimeoutError, httpx.HTTPError, ValueError) as exc:
+        return _llm_failed(parsed, exc)
+
+    return _apply_llm_data(parsed, mode, spans, llm_data)
+
+
+def extract_order(text: str, budget_s: Optional[float] = None) -> ParsedOrder:
+    """
+    Main entry point used by the FastAPI route.
+    """
+    start = time.monotonic()
+    # 1) Rule-based extraction
+    parsed = extract_order_rule_based(text)
+
+    # 2) LLM fallback with whatever is left of the budget
+    remaining = _llm_budget(budget_s) - (time.monotonic() - start)
+    parsed = apply_llm_fallback(parsed, remaining)
+    record_order(parsed, time.monotonic() - start)
+    return parsed
+
+
+async def extract_order_async(text: str, budget_s: Optional[float] = None) -> ParsedOrder:
+    """
+    Async entry point for the FastAPI routes. The CPU-bound rule-based part
+    runs in a worker thread so it does not block the event loop.
+    """
+    start = time.monotonic()
+    parsed = await asyncio.to_thread(extract_order_rule_based, text)
+    remaining = _llm_budget(budget_s) - (time.monotonic() - start)
+    parsed = await apply_llm_fallback_async(parsed, remaining)
+    record_order(parsed, time.monotonic() - start)
+    return parsed
+
+
+async def stream_order_async(text: str, budget_s: Optional[float] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming entry point. Yields ("medicine", MedicineRequest) events as
+    soon as each medicine is known, then ("done", ParsedOrder).
+
+    Rule-based results (completed by a partial fallback if needed) are
+    emitted together; a full re-extraction streams each LLM medicine,
+    enriched with find_best_product_for_name, as its JSON object closes.
+    Medicines streamed before the budget runs out are kept.
+    """
+    start = time.monotonic()
+    parsed = await asyncio.to_thread(extract_order_rule_based, text)
+    deadline = start + _llm_budget(budget_s)
+
+    mode, _ = _plan_fallback(parsed)
+    if mode != "full":
+        if mode == "partial":
+            parsed = await apply_llm_fallback_async(parsed, deadline - time.monotonic())
+        record_order(parsed, time.monotonic() - start)
+        for med in parsed.medicines:
+            yield "medicine", med
+        yield "done", parsed
+        return
+
+    llm_meds: List[MedicineRequest] = []
+    if not llm_breaker.allow():
+        _degrade(parsed, "circuit_open")
+    else:
+        stream = llm_stream_medicines(parsed.original_text)
+        llm_start = time.perf_counter()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                m = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                med = await asyncio.to_thread(_medicine_from_llm, m)
+                llm_meds.append(med)
+                yield "medicine", med
+        except StopAsyncIteration:
+            parsed.meta["llm_fallback"] = "ok"
+            parsed.meta["llm_mode"] = "full"
+        except (asyncio.TimeoutError, httpx.HTTPError, ValueError) as exc:
+            _llm_failed(parsed, exc)
+        finally:
+            await stream.aclose()
+            # Includes the per-medicine product lookups done while streaming
+            parsed.timings["llm"] = time.perf_counter() - llm_start
+
+    if llm_meds:
+        parsed.medicines = llm_meds
+    record_order(parsed, time.monotonic() - start)
+    yield "done", parsed
@@ -0,0 +1,317 @@
+"""
+Single-pass span annotator for dosage and quantity extraction.
+
+The text is tokenized once; a small scanner walks the tokens and tags
+strength / form / frequency / duration / quantity spans with their
+character offsets. Each span is then assigned to the nearest medicine
+mention, so the cost is linear in the text instead of
+medicines x patterns x text, and two medicines in one sentence each get
+their own details (overlapping mentions such as "vitasprint" and
+"vitasprint b12" count as one). Only a lone mention, or a medicine whose
+phrase is not in the text, falls back to the whole text like the window
+extractors did; with several mentions a missing field stays unresolved
+rather than borrowing another medicine's value.
+
+One deliberate difference from dosage.py / quantity.py: a bare number is
+read either as a strength or as a quantity, never both. 3-4 digits ("650")
+are a strength in mg; 1-2 digits ("20") are a quantity. The old regexes
+also read 10-99 as mg (STRENGTH_NUMBER_ONLY_PATTERN), so "norsan 20" had
+strength "20mg" and quantity 20.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dosage import _build_raw_text
+from .dosage_normalizer import normalize_form_token, normalize_unit_token
+from .quantity import NUMBER_WORDS
+
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]+")
+
+STRENGTH_UNITS = {"mg", "mcg", "g", "ml"}
+QUANTITY_UNITS = {
+    "strip", "strips", "box", "boxes", "pack", "packs",
+    "tablet", "tablets", "tab", "tabs", "capsule", "capsules", "cap", "caps",
+    "pill", "pills", "dose", "doses",
+}
+HOUR_WORDS = {"hour", "hours", "hr", "hrs", "h"}
+TIME_OF_DAY = [
+    ("at", "night"),
+    ("before", "bed"),
+    ("in", "the", "morning"),
+    ("at", "bedtime"),
+    ("after", "dinner"),
+    ("before", "breakfast"),
+]
+FORM_MIN_LEN, FORM_MAX_LEN = 4, 12
+
+_TIME_OF_DAY_BY_FIRST: Dict[str, List[Tuple[str, ...]]] = {}
+for _phrase in TIME_OF_DAY:
+    _TIME_OF_DAY_BY_FIRST.setdefault(_phrase[0], []).append(_phrase)
+# Words that can start a span; any other word can only be a form
+_TRIGGER_WORDS = {"every", "q", "once", "twice", "thrice", "for", "x"} | set(_TIME_OF_DAY_BY_FIRST) | set(NUMBER_WORDS)
+
+
+class Token(NamedTuple):
+    text: str     # lowercased
+    start: int
+    end: int
+
+
+class Span(NamedTuple):
+    kind: str     # strength, strength_bare, form, freq_nl, freq_interval, freq_tod, duration,
+                  # quantity, quantity_bare, quantity_word
+    start: int
+    end: int
+    value: Any
+
+
+def tokenize(text: str) -> List[Token]:
+    return [Token(m.group(0).lower(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+def _is_num(tok: Token) -> bool:
+    return tok.text[0].isdigit()
+
+
+def _word(tokens: Sequence[Token], i: int) -> Optional[str]:
+    return tokens[i].text if i < len(tokens) else None
+
+
+def annotate(text: str) -> List[Span]:
+    """
+    Tag every dosage/quantity span in `text`, in order of position.
+    """
+    tokens = tokenize(text)
+    spans: List[Span] = []
+    n = len(tokens)
+    i = 0
+    while i < n:
+        tok = tokens[i]
+        t = tok.text
+        if t not in _TRIGGER_WORDS and not t[0].isdigit():
+            if FORM_MIN_LEN <= len(t) <= FORM_MAX_LEN:
+                form = normalize_form_token(t)
+                if form:
+                    spans.append(Span("form", tok.start, tok.end, form))
+            i += 1
+            continue
+        nxt = _word(tokens, i + 1)
+
+        # every N hours / q N h
+        if t in ("every", "q") and nxt is not None and _is_num(tokens[i + 1]) and _word(tokens, i + 2) in HOUR_WORDS:
+            spans.append(Span("freq_interval", tok.start, tokens[i + 2].end, f"every {nxt}h"))
+            i += 3
+            continue
+
+        # once/twice/thrice/N times [a|per] day|daily
+        j = None
+        if t in ("once", "twice", "thrice"):
+            j = i + 1
+        elif _is_num(tok) and nxt in ("time", "times"):
+            j = i + 2
+        if j is not None:
+            if _word(tokens, j) in ("a", "per"):
+                j += 1
+            if _word(tokens, j) in ("day", "daily"):
+                end = tokens[j].end
+                spans.append(Span("freq_nl", tok.start, end, text[tok.start:end].lower()))
+                i = j + 1
+                continue
+
+        # fixed time-of-day phrases
+        matched_tod = False
+        for phrase in _TIME_OF_DAY_BY_FIRST.get(t, ()):
+            k = len(phrase)
+            if tuple(x.text for x in tokens[i : i + k]) == phrase:
+                end = tokens[i + k - 1].end
+                spans.append(Span("freq_tod", tok.start, end, " ".join(phrase)))
+                i += k
+                matched_tod = True
+                break
+        if matched_tod:
+            continue
+
+        # for|x N <time unit>
+        if t in ("for", "x") and nxt is not None and _is_num(tokens[i + 1]):
+            unit_word = _word(tokens, i + 2)
+            if unit_word and 3 <= len(unit_word) <= 10:
+                unit = normalize_unit_token(unit_word)
+                if unit:
+                    num = tokens[i + 1].text
+                    value = f"{num} {unit}" if num == "1" else f"{num} {unit}s"
+                    spans.append(Span("duration", tok.start, tokens[i + 2].end, value))
+                    i += 3
+                    continue
+                if unit_word not in QUANTITY_UNITS:
+                    # "for 5 dyas": a failed duration, not a quantity
+                    i += 2
+                    continue
+
+        if _is_num(tok):
+            if nxt in STRENGTH_UNITS:
+                spans.append(Span("strength", tok.start, tokens[i + 1].end, f"{t}{nxt}"))
+                i += 2
+                continue
+            if nxt in QUANTITY_UNITS:
+                spans.append(Span("quantity", tok.start, tokens[i + 1].end, int(float(t))))
+                # the unit word may also name the form ("2 tablets")
+                i += 1
+                continue
+            if "." not in t and 3 <= len(t) <= 4:
+                # bare "650": assume mg, as the old number-only fallback did
+                spans.append(Span("strength_bare", tok.start, tok.end, f"{t}mg"))
+            elif "." not in t:
+                # bare "20": a count, not "20mg" (see the module docstring)
+                spans.append(Span("quantity_bare", tok.start, tok.end, int(t)))
+            i += 1
+            continue
+
+        if t in NUMBER_WORDS:
+            if nxt in QUANTITY_UNITS:
+                spans.append(Span("quantity", tok.start, tokens[i + 1].end, NUMBER_WORDS[t]))
+            else:
+                spans.append(Span("quantity_word", tok.start, tok.end, NUMBER_WORDS[t]))
+            i += 1
+            continue
+
+        if FORM_MIN_LEN <= len(t) <= FORM_MAX_LEN:
+            form = normalize_form_token(t)
+            if form:
+                spans.append(Span("form", tok.start, tok.end, form))
+        i += 1
+
+    return spans
+
+
+def assign(spans: Sequence[Span], mentions: Sequence[Tuple[int, int]]) -> List[List[Span]]:
+    """
+    Give each span to the nearest mention (ties go to the earlier one).
+    Bare numbers and quantities inside a mention are part of the product
+    name ("omega 3", "b12") and are dropped.
+    """
+    per_mention: List[List[Span]] = [[] for _ in mentions]
+    if not mentions or not spans:
+        return per_mention
+    m_start = np.array([m[0] for m in mentions])
+    m_end = np.array([m[1] for m in mentions])
+    s_start = np.array([s.start for s in spans])[:, None]
+    s_end = np.array([s.end for s in spans])[:, None]
+    # Gap between span and mention, 0 when they overlap; argmin keeps the
+    # first (earliest) mention on ties
+    dists = np.maximum(0, np.maximum(m_start - s_end, s_start - m_end))
+    best = dists.argmin(axis=1).tolist()
+    for span, k, dist in zip(spans, best, dists[np.arange(len(spans)), best].tolist()):
+        if dist == 0 and span.kind in ("strength_bare", "quantity_bare", "quantity_word"):
+            start, end = mentions[k]
+            if start <= span.start and span.end <= end:
+                continue
+        per_mention[k].append(span)
+    return per_mention
+
+
+def _first(spans: Sequence[Span], kind: str) -> Optional[Any]:
+    for s in spans:
+        if s.kind == kind:
+            return s.value
+    return None
+
+
+def details_from_spans(spans: Sequence[Span]) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+    """
+    (dosage dict in the extract_dosage shape or None, quantity or None)
+    """
+    strength = _first(spans, "strength") or _first(spans, "strength_bare")
+    form = _first(spans, "form")
+    duration = _first(spans, "duration")
+
+    parts: List[str] = []
+    for kind in ("freq_nl", "freq_interval", "freq_tod"):
+        value = _first(spans, kind)
+        if value and value not in parts:
+            parts.append(value)
+    frequency = ", ".join(parts) if parts else None
+
+    # "2 strips" beats a bare "2", which beats a bare "two"
+    quantity = None
+    for kind in ("quantity", "quantity_bare", "quantity_word"):
+        quantity = _first(spans, kind)
+        if quantity is not None:
+            break
+
+    raw = _build_raw_text(strength, form, frequency, duration)
+    dosage = {
+        "raw": raw,
+        "strength": strength,
+        "form": form,
+        "frequency": frequency,
+        "duration": duration,
+    }
+    return (dosage if any(dosage.values()) else None), quantity
+
+
+def extract_details(text: str, phrases: Sequence[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[int]]]:
+    """
+    One pass over `text` for all medicine mentions (`phrases` as matched
+    by extract_medicines). Returns (dosage, quantity) per phrase.
+    """
+    return details_for_spans(text, annotate(text), phrases)
+
+
+def _merge_overlapping(mentions: Sequence[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    (stretches of text covered by overlapping mentions, stretch index of
+    each mention). "vitasprint" and "vitasprint b12" read the same words,
+    so they share one stretch instead of competing for its spans.
+    """
+    stretches: List[Tuple[int, int]] = []
+    owner = [0] * len(mentions)
+    for k in sorted(range(len(mentions)), key=lambda k: mentions[k]):
+        start, end = mentions[k]
+        if stretches and start < stretches[-1][1]:
+            stretches[-1] = (stretches[-1][0], max(stretches[-1][1], end))
+        else:
+            stretches.append((start, end))
+        owner[k] = len(stretches) - 1
+    return stretches, owner
+
+
+def details_for_spans(
+    text: str, spans: Sequence[Span], phrases: Sequence[str]
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[int]]]:
+    """
+    extract_details with the annotation of `text` already done.
+
+    Overlapping mentions share the spans of the stretch they cover.
+    Phrases not found in the text take no part in the assignment and fall
+    back to the spans of the whole text (minus numbers inside product
+    names); so do the mentions of a single stretch left without a dosage
+    or quantity. With several stretches a missing field stays unresolved.
+    """
+    lowered = text.lower()
+    mentions: List[Optional[Tuple[int, int]]] = []
+    for phrase in phrases:
+        idx = lowered.find(phrase.lower())
+        mentions.append((idx, idx + len(phrase)) if idx != -1 else None)
+
+    stretches, owner = _merge_overlapping([m for m in mentions if m is not None])
+    per_stretch = assign(spans, stretches)
+    if stretches:
+        kept = sorted((s for group in per_stretch for s in group), key=lambda s: s.start)
+    else:
+        kept = list(spans)
+    owners = iter(owner)
+    whole: Optional[Tuple[Optional[Dict[str, Any]], Optional[int]]] = None
+
+    results: List[Tuple[Optional[Dict[str, Any]], Optional[int]]] = []
+    for mention in mentions:
+        dosage, quantity = details_from_spans(per_stretch[next(owners)] if mention is not None else [])
+        if (dosage is None or quantity is None) and (mention is None or len(stretches) == 1):
+            if whole is None:
+                whole = details_from_spans(kept)
+            dosage = dosage or whole[0]
+            quantity = quantity if quantity is not None else whole[1]
+        results.append((dosage, quantity))
+    return results
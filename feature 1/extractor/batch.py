@@ -0,0 +1,112 @@
+"""Batch order extraction: rule-based work in a process pool, LLM fallbacks concurrently."""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple
+
+from . import ParsedOrder, apply_llm_fallback_async, extract_order_rule_based
+from .catalog import CatalogWatcher, current_catalog
+from .language import SupportedLanguage, detect_languages
+from .llm_parser import LLM_BUDGET_S
+from .log import configure_worker_logging, reset_trace, trace_forced, trace_request, worker_log_queue
+from .metrics import record_order
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or (os.cpu_count() or 1)
+MAX_BATCH_SIZE = 500
+
+BatchResult = Tuple[Optional[ParsedOrder], Optional[str]]  # (parsed, error)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(log_queue) -> None:
+    """
+    Send logs to the parent, load the catalog snapshot once per worker
+    process and keep it fresh.
+    """
+    configure_worker_logging(log_queue)
+    current_catalog()
+    CatalogWatcher().start()
+
+
+def _rule_based_job(
+    text: str, trace: bool = False, lang: Optional[SupportedLanguage] = None
+) -> BatchResult:
+    # The trace flag of the request does not cross the process boundary by itself
+    token = trace_request(trace)
+    try:
+        return extract_order_rule_based(text, lang), None
+    except Exception as exc:  # reported per item, never fails the batch
+        return None, f"{type(exc).__name__}: {exc}"
+    finally:
+        reset_trace(token)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS, initializer=_init_worker, initargs=(worker_log_queue(),)
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+async def _fallback_job(parsed: ParsedOrder, budget_s: Optional[float]) -> BatchResult:
+    try:
+        return await apply_llm_fallback_async(parsed, budget_s), None
+    except Exception as exc:
+        # Keep the rule-based result visible next to the error
+        return parsed, f"llm fallback failed: {type(exc).__name__}: {exc}"
+
+
+async def extract_orders_batch(texts: List[str], budget_s: Optional[float] = None) -> List[BatchResult]:
+    """
+    Run extract_order over many texts.
+
+    Returns one (parsed, error) pair per input, in input order. A failure in
+    one item never affects the others. LLM concurrency is bounded by the
+    Ollama client's semaphore; `budget_s` bounds the whole call.
+    """
+    start = time.monotonic()
+    if not texts:
+        return []
+
+    pool = get_pool()
+    chunksize = max(1, len(texts) // (BATCH_WORKERS * 4))
+    trace = trace_forced()
+    loop = asyncio.get_running_loop()
+    try:
+        # Detect here so an optional fastText model sees the whole batch in one query
+        langs = await asyncio.to_thread(detect_languages, texts)
+        rule_results: List[BatchResult] = await loop.run_in_executor(
+            None, lambda: list(pool.map(_rule_based_job, texts, repeat(trace), langs, chunksize=chunksize))
+        )
+    except Exception as exc:  # e.g. BrokenProcessPool; start fresh next time
+        shutdown_pool()
+        error = f"{type(exc).__name__}: {exc}"
+        return [(None, error) for _ in texts]
+
+    results: List[BatchResult] = list(rule_results)
+    pending = [i for i, (parsed, _) in enumerate(rule_results) if parsed is not None]
+
+    remaining = (LLM_BUDGET_S if budget_s is None else budget_s) - (time.monotonic() - start)
+    fallbacks = await asyncio.gather(*(_fallback_job(rule_results[i][0], remaining) for i in pending))
+    for i, result in zip(pending, fallbacks):
+        results[i] = result
+        record_order(result[0])
+
+    return results
@@ -0,0 +1,267 @@
+"""
+Versioned, immutable catalog snapshots with background hot reload.
+
+Everything derived from products-export.csv (product rows, name lists and
+match indexes) lives in one CatalogSnapshot. A new snapshot is built off
+the request path when the CSV changes and swapped in with a single
+assignment, so readers always see either the old or the new catalog.
+
+Rows are stored columnar (see catalog_store). If a compiled artifact at
+CATALOG_ARTIFACT is at least as new as the CSV it is mmapped instead of
+parsing the CSV.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from typing_extensions import NotRequired, TypedDict  # NotRequired is in typing from 3.11
+
+from .catalog_store import ColumnarCatalog, ProductRows, compile_rows
+from .log import get_logger
+from .name_index import NameIndex
+from .preprocess import normalize_text
+from .spelling import build_token_index
+from .symspell import DeleteIndex
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+PRODUCTS_CSV = os.getenv("PRODUCTS_CSV", os.path.join(DATA_DIR, "products-export.csv"))
+CATALOG_ARTIFACT = os.getenv("CATALOG_ARTIFACT", os.path.join(DATA_DIR, "products-export.pcat"))
+
+CATALOG_POLL_S = float(os.getenv("CATALOG_POLL_S", "5"))
+
+log = get_logger(__name__)
+
+
+class Product(TypedDict):
+    product_id: str
+    name: str
+    name_normalized: str
+    pzn: str
+    price_rec: float
+    package_size: str
+    description: NotRequired[str]  # only on rows fetched with_description
+
+
+class ProductIndexes(NamedTuple):
+    # Values are row numbers into CatalogSnapshot.products
+    by_name: Dict[str, int]       # name_normalized / normalize_text(name) -> first row
+    by_pzn: Dict[str, int]
+    by_id: Dict[str, int]
+    fuzzy_corpus: List[str]       # lowered names, same order as products
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str                  # content hash of the CSV
+    loaded_at: float
+    source_mtime: float
+    source: str                   # file the snapshot was loaded from
+    store: ColumnarCatalog
+    products: ProductRows         # rows materialized on access
+    names: List[str]              # raw product names
+    indexes: ProductIndexes
+    medicine_names: List[str]     # normalize_text(name), matched by extract_medicines
+    name_index: NameIndex
+    token_index: DeleteIndex      # typo index over the words of medicine_names
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.lower().strip().split())
+
+
+def _normalize_pzn(pzn: str) -> str:
+    """
+    PZNs are 8 digits; scanners often drop leading zeros or add a "PZN-" prefix.
+    """
+    digits = re.sub(r"\D", "", str(pzn))
+    return digits.zfill(8) if digits else ""
+
+
+def _parse_products(text: str) -> List[Product]:
+    products: List[Product] = []
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    for row in reader:
+        raw_name = row["product name"].strip()
+        try:
+            price = float(str(row["price rec"]).replace(",", "."))
+        except ValueError:
+            price = 0.0
+
+        products.append(
+            {
+                "product_id": str(row["product id"]).strip(),
+                "name": raw_name,
+                "name_normalized": _normalize_name(raw_name),
+                "pzn": str(row["pzn"]).strip(),
+                "price_rec": price,
+                "package_size": str(row["package size"]).strip(),
+                "description": row.get("descriptions", "").strip(),
+            }
+        )
+    return products
+
+
+def _csv_version(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+
+def _build_indexes(store: ColumnarCatalog, names: List[str]) -> ProductIndexes:
+    by_name: Dict[str, int] = {}
+    by_pzn: Dict[str, int] = {}
+    by_id: Dict[str, int] = {}
+    pzns = store.column("pzn")
+    ids = store.column("product_id")
+    for i, name in enumerate(names):
+        # setdefault keeps the first row, like the old linear scan did
+        by_name.setdefault(_normalize_name(name), i)
+        pzn = _normalize_pzn(pzns[i])
+        if pzn:
+            by_pzn.setdefault(pzn, i)
+        by_id.setdefault(ids[i], i)
+    for i, name in enumerate(names):
+        # extract_medicines yields normalize_text() names ("omega 3", not "omega-3")
+        by_name.setdefault(_normalize_name(normalize_text(name)), i)
+    corpus = [n.lower() for n in names]
+    return ProductIndexes(by_name, by_pzn, by_id, corpus)
+
+
+def _source_mtime() -> float:
+    mtimes = [os.stat(p).st_mtime for p in (PRODUCTS_CSV, CATALOG_ARTIFACT) if os.path.exists(p)]
+    if not mtimes:
+        raise FileNotFoundError(PRODUCTS_CSV)
+    return max(mtimes)
+
+
+def _load_store() -> Tuple[ColumnarCatalog, str]:
+    """
+    mmap the compiled artifact if it is current, otherwise parse the CSV
+    and compile it in memory.
+    """
+    csv_mtime = os.stat(PRODUCTS_CSV).st_mtime if os.path.exists(PRODUCTS_CSV) else None
+    if os.path.exists(CATALOG_ARTIFACT) and (
+        csv_mtime is None or os.stat(CATALOG_ARTIFACT).st_mtime >= csv_mtime
+    ):
+        return ColumnarCatalog.open(CATALOG_ARTIFACT), CATALOG_ARTIFACT
+
+    with open(PRODUCTS_CSV, "rb") as f:
+        raw = f.read()
+    rows = _parse_products(raw.decode("utf-8"))
+    return ColumnarCatalog(compile_rows(rows, _csv_version(raw))), PRODUCTS_CSV
+
+
+def build_snapshot() -> CatalogSnapshot:
+    mtime = _source_mtime()
+    store, source = _load_store()
+    return snapshot_from_store(store, source, mtime)
+
+
+def snapshot_from_store(store: ColumnarCatalog, source: str, source_mtime: float) -> CatalogSnapshot:
+    """
+    Snapshot with every index built from `store`; its version is the store's.
+    """
+    names = store.column("name")
+    medicine_names = [normalize_text(n) for n in names]
+    return CatalogSnapshot(
+        version=store.version,
+        loaded_at=time.time(),
+        source_mtime=source_mtime,
+        source=source,
+        store=store,
+        products=ProductRows(store),
+        names=names,
+        indexes=_build_indexes(store, names),
+        medicine_names=medicine_names,
+        name_index=NameIndex(medicine_names),
+        token_index=build_token_index(medicine_names),
+    )
+
+
+_current: Optional[CatalogSnapshot] = None
+_build_lock = threading.Lock()
+
+
+def current_catalog() -> CatalogSnapshot:
+    """
+    The live snapshot. Built on first use if the app did not warm it up.
+    """
+    snap = _current
+    if snap is not None:
+        return snap
+    with _build_lock:
+        if _current is None:
+            _swap(build_snapshot())
+        return _current
+
+
+def _swap(snap: CatalogSnapshot) -> None:
+    global _current
+    _current = snap
+
+
+def reload_if_changed() -> bool:
+    """
+    Rebuild and swap if the CSV changed on disk. Returns True on swap.
+    A CSV that fails to parse (e.g. mid-write) leaves the old snapshot live.
+    """
+    old = current_catalog()
+    try:
+        if _source_mtime() == old.source_mtime:
+            return False
+        with _build_lock:
+            new = build_snapshot()
+            if new.version == old.version:
+                _swap(new)  # touched, not changed: just remember the new mtime
+                return False
+            _swap(new)
+    except (OSError, KeyError, ValueError, csv.Error) as exc:
+        log.warning("catalog reload failed", extra={"fields": {"error": repr(exc)}})
+        return False
+    log.info(
+        "catalog reloaded",
+        extra={"fields": {"old_version": old.version, "version": new.version, "products": len(new.products)}},
+    )
+    return True
+
+
+class CatalogWatcher:
+    """
+    Daemon thread polling the CSV / artifact every `interval` seconds.
+    """
+
+    def __init__(self, interval: float = CATALOG_POLL_S):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            reload_if_changed()
+
+
+def catalog_info() -> Dict[str, object]:
+    snap = current_catalog()
+    return {
+        "version": snap.version,
+        "products": len(snap.products),
+        "loaded_at": snap.loaded_at,
+        "source": snap.source,
+    }
@@ -0,0 +1,169 @@
+"""
+Compact columnar catalog store.
+
+Products are kept as NumPy columns over one interned UTF-8 string table
+instead of one dict per row, and can be compiled into a binary artifact
+that workers mmap at startup instead of re-parsing the CSV
+(see extractor/compile_catalog.py).
+
+Layout (little endian, every section 8-byte aligned):
+
+    magic "PHCAT001" | n_rows u64 | n_strings u64 | blob_len u64 | version 16s
+    string offsets u64[n_strings + 1] | string blob
+    product_id, name, pzn, package_size, description: u32[n_rows] string ids
+    price_rec: f64[n_rows]
+"""
+
+import mmap
+import struct
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+MAGIC = b"PHCAT001"
+_HEADER = struct.Struct("<8sQQQ16s")
+STRING_COLUMNS = ("product_id", "name", "pzn", "package_size", "description")
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def _pad(n: int) -> int:
+    return (-n) % 8
+
+
+def compile_rows(rows: Iterable[Dict[str, object]], version: str) -> bytes:
+    """
+    Serialize product rows (Product dicts) into the binary layout above.
+    Identical strings are stored once.
+    """
+    table: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(value: object) -> int:
+        text = str(value)
+        sid = table.get(text)
+        if sid is None:
+            sid = table[text] = len(strings)
+            strings.append(text.encode("utf-8"))
+        return sid
+
+    columns: Dict[str, List[int]] = {c: [] for c in STRING_COLUMNS}
+    prices: List[float] = []
+    for row in rows:
+        for c in STRING_COLUMNS:
+            columns[c].append(intern(row[c]))
+        prices.append(float(row["price_rec"]))
+
+    offsets = np.zeros(len(strings) + 1, dtype="<u8")
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    blob = b"".join(strings)
+
+    parts = [
+        _HEADER.pack(MAGIC, len(prices), len(strings), len(blob), version.encode("ascii")[:16]),
+        offsets.tobytes(),
+        blob,
+        b"\0" * _pad(len(blob)),
+    ]
+    for c in STRING_COLUMNS:
+        parts.append(np.asarray(columns[c], dtype="<u4").tobytes())
+        parts.append(b"\0" * _pad(4 * len(prices)))
+    parts.append(np.asarray(prices, dtype="<f8").tobytes())
+    return b"".join(parts)
+
+
+class ColumnarCatalog:
+    """
+    Read-only view over a compiled buffer (bytes or mmap). Columns are
+    zero-copy NumPy views; strings are decoded only when asked for.
+    """
+
+    def __init__(self, buf: Buffer):
+        self._buf = buf
+        magic, n_rows, n_strings, blob_len, version = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("not a compiled catalog file")
+        self.version = version.rstrip(b"\0").decode("ascii")
+        self.n_rows = n_rows
+
+        pos = _HEADER.size
+        self._offsets = np.frombuffer(buf, dtype="<u8", count=n_strings + 1, offset=pos)
+        pos += 8 * (n_strings + 1)
+        self._blob = memoryview(buf)[pos : pos + blob_len]
+        pos += blob_len + _pad(blob_len)
+
+        self._columns: Dict[str, np.ndarray] = {}
+        for c in STRING_COLUMNS:
+            self._columns[c] = np.frombuffer(buf, dtype="<u4", count=n_rows, offset=pos)
+            pos += 4 * n_rows + _pad(4 * n_rows)
+        self.price_rec = np.frombuffer(buf, dtype="<f8", count=n_rows, offset=pos)
+
+    @classmethod
+    def open(cls, path: str) -> "ColumnarCatalog":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def string(self, sid: int) -> str:
+        start, end = self._offsets[sid], self._offsets[sid + 1]
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def column(self, name: str) -> List[str]:
+        """
+        Decode a whole string column, e.g. names for fuzzy matching.
+        """
+        return [self.string(sid) for sid in self._columns[name].tolist()]
+
+    def value(self, name: str, i: int) -> str:
+        return self.string(int(self._columns[name][i]))
+
+    def row(self, i: int) -> Dict[str, object]:
+        """
+        Product fields without the description, which only the products API
+        returns; see description().
+        """
+        name = self.value("name", i)
+        return {
+            "product_id": self.value("product_id", i),
+            "name": name,
+            "name_normalized": " ".join(name.lower().strip().split()),
+            "pzn": self.value("pzn", i),
+            "price_rec": float(self.price_rec[i]),
+            "package_size": self.value("package_size", i),
+        }
+
+    def description(self, i: int) -> str:
+        return self.value("description", i)
+
+
+class ProductRows(Sequence):
+    """
+    List-like access to products; each row dict is built on demand. Rows
+    leave out the long descriptions, which stay encoded in the buffer until
+    a response asks for one via description().
+    """
+
+    def __init__(self, store: ColumnarCatalog):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.store.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.store.row(i)
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        for i in range(len(self)):
+            yield self.store.row(i)
+
+    def description(self, i: int) -> str:
+        return self.store.description(i)
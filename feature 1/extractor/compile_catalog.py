@@ -0,0 +1,34 @@
+"""
+Compile products-export.csv into the binary catalog artifact that
+extractor.catalog mmaps at startup:
+
+    python -m extractor.compile_catalog data/products-export.csv -o data/products-export.pcat
+"""
+
+import argparse
+import os
+
+from .catalog import CATALOG_ARTIFACT, PRODUCTS_CSV, _csv_version, _parse_products
+from .catalog_store import compile_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile products-export.csv into a binary catalog file.")
+    parser.add_argument("csv", nargs="?", default=PRODUCTS_CSV)
+    parser.add_argument("-o", "--output", default=CATALOG_ARTIFACT)
+    args = parser.parse_args()
+
+    with open(args.csv, "rb") as f:
+        raw = f.read()
+    rows = _parse_products(raw.decode("utf-8"))
+    data = compile_rows(rows, _csv_version(raw))
+
+    tmp = args.output + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, args.output)  # atomic, so watchers never see a partial file
+    print(f"compiled {len(rows)} products -> {args.output} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
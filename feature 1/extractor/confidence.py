@@ -0,0 +1,155 @@
+"""Per-field confidence for rule-based medicines and span-targeted LLM fallback."""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .dosage import _build_raw_text
+from .quantity import NUMBER_WORDS
+
+SPAN_CHARS = 50  # text kept on each side of a medicine mention
+
+RULE_CONFIDENCE = 1.0
+LLM_CONFIDENCE = 0.7
+
+# Field groups the order needs; a group is resolved if any of its fields is set.
+FIELD_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "dosage": ("strength", "form"),
+    "quantity": ("quantity",),
+    "schedule": ("frequency", "duration"),
+}
+
+# Cheap signals that the span mentions a group at all. If it does not, the
+# LLM has nothing to recover and the span is not sent.
+_EVIDENCE: Dict[str, re.Pattern] = {
+    "dosage": re.compile(
+        r"\d\s*(?:mg|mcg|g|ml|iu|i\.e)\b"
+        r"|\b(?:tab\w*|cap\w*|kaps\w*|syrup|saft|drops?|tropfen|spray|gel|creme|cream|salbe|lotion|inject\w*)\b"
+    ),
+    "quantity": re.compile(r"\d|\b(?:" + "|".join(NUMBER_WORDS) + r"|pack\w*|box\w*|strips?)\b"),
+    "schedule": re.compile(
+        r"\b(?:once|twice|thrice|times?|daily|day|days|night|morning|evening|bed\w*|hours?|hrs?|weeks?|months?"
+        r"|q\d+h|every|x\s*\d+|tag|tage|morgens|abends|woche\w*)\b"
+    ),
+}
+
+
+def _fields(med: Any) -> Dict[str, Any]:
+    details = med.dosage_details or {}
+    return {
+        "strength": details.get("strength"),
+        "form": details.get("form"),
+        "frequency": details.get("frequency"),
+        "duration": details.get("duration"),
+        "quantity": med.quantity,
+    }
+
+
+def field_confidence(med: Any, name_score: float) -> Dict[str, float]:
+    """
+    Confidence per field for a rule-based medicine: the fuzzy name score,
+    RULE_CONFIDENCE for fields the rules found, 0.0 for missing ones.
+    """
+    conf = {"name": round(name_score / 100.0, 3)}
+    for field, value in _fields(med).items():
+        conf[field] = RULE_CONFIDENCE if value not in (None, "") else 0.0
+    return conf
+
+
+def unresolved_groups(med: Any) -> List[str]:
+    values = _fields(med)
+    return [
+        group
+        for group, fields in FIELD_GROUPS.items()
+        if not any(values[f] not in (None, "") for f in fields)
+    ]
+
+
+def _span_text(work_text: str, phrase: str) -> str:
+    idx = work_text.find(phrase)
+    if idx == -1:
+        return work_text[: 2 * SPAN_CHARS]
+    start = max(0, idx - SPAN_CHARS)
+    end = min(len(work_text), idx + len(phrase) + SPAN_CHARS)
+    # Do not cut words in half
+    if start > 0:
+        space = work_text.find(" ", start)
+        start = space + 1 if space != -1 and space < idx else start
+    if end < len(work_text):
+        space = work_text.rfind(" ", idx + len(phrase), end)
+        end = space if space != -1 else end
+    return work_text[start:end]
+
+
+def build_spans(medicines: List[Any], work_text: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    (medicine index, span) for every medicine with unresolved field groups
+    whose surrounding text shows evidence of them.
+    """
+    spans: List[Tuple[int, Dict[str, Any]]] = []
+    for i, med in enumerate(medicines):
+        missing_groups = unresolved_groups(med)
+        if not missing_groups:
+            continue
+        text = _span_text(work_text, med.matched_name)
+        # The product name itself ("... Kapseln 500 mg") is not evidence
+        context = text.replace(med.matched_name, " ")
+        missing_groups = [g for g in missing_groups if _EVIDENCE[g].search(context)]
+        if not missing_groups:
+            continue
+        missing = [f for g in missing_groups for f in FIELD_GROUPS[g]]
+        spans.append(
+            (i, {"id": len(spans) + 1, "medicine": med.name, "text": text, "missing": missing})
+        )
+    return spans
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_span_result(
+    medicines: List[Any],
+    spans: List[Tuple[int, Dict[str, Any]]],
+    llm_data: Dict[str, Any],
+) -> int:
+    """
+    Fill only the missing fields of the targeted medicines, in place.
+    Rule-based values are never overwritten. Returns the number of fields filled.
+    """
+    by_id = {span["id"]: (i, span) for i, span in spans}
+    filled = 0
+    for item in llm_data.get("items", []):
+        target = by_id.get(_as_int(item.get("id")))
+        if target is None:
+            continue
+        i, span = target
+        med = medicines[i]
+        current = _fields(med)
+        details = dict(med.dosage_details or {})
+        conf = dict(med.confidence or {})
+
+        for field in span["missing"]:
+            value = item.get(field)
+            if value in (None, "") or current[field] not in (None, ""):
+                continue
+            if field == "quantity":
+                value = _as_int(value)
+                if value is None:
+                    continue
+                med.quantity = value
+            else:
+                details[field] = str(value)
+            conf[field] = LLM_CONFIDENCE
+            filled += 1
+
+        if details:
+            details["raw"] = _build_raw_text(
+                details.get("strength"), details.get("form"), details.get("frequency"), details.get("duration")
+            )
+            med.dosage_details = details
+            med.dosage = details["raw"]
+        med.confidence = conf
+    return filled
@@ -1,6 +1,8 @@
 # extractor/dosage_normalizer.py
-from typing import Optional
-from rapidfuzz import fuzz, process
+from functools import lru_cache
+from typing import Dict, Optional
+
+from .symspell import DeleteIndex
 
 CANONICAL_FORMS = [
     "tablet", "capsule", "syrup", "suspension",
@@ -10,39 +12,65 @@ CANONICAL_UNITS = [
     "day", "week", "month",
 ]
 
+# German / romanized Hindi spellings -> canonical. Text reaching the
+# normalizer went through normalize_text(), so no umlauts here.
+FORM_VARIANTS: Dict[str, str] = {
+    "tablette": "tablet", "tabletten": "tablet", "filmtablette": "tablet", "goli": "tablet",
+    "kapsel": "capsule", "kapseln": "capsule",
+    "sirup": "syrup", "saft": "syrup", "sharbat": "syrup",
+    "suspension": "suspension",
+    "injektion": "injection", "spritze": "injection", "tika": "injection",
+    "tropfen": "drop", "boond": "drop", "boonde": "drop",
+}
+UNIT_VARIANTS: Dict[str, str] = {
+    "tag": "day", "tage": "day", "tagen": "day", "din": "day",
+    "woche": "week", "wochen": "week", "hafta": "week", "saptah": "week",
+    "monat": "month", "monate": "month", "monaten": "month", "mahina": "month", "mahine": "month",
+}
+
 FUZZY_THRESHOLD_FORM = 85
 FUZZY_THRESHOLD_UNIT = 85
 
+NORMALIZER_CACHE_SIZE = 4096
+
+
+def _vocabulary(canonical, variants: Dict[str, str]) -> Dict[str, str]:
+    # Canonical words first so they win ties, as with extractOne on the old lists
+    vocab = {w: w for w in canonical}
+    for variant, target in variants.items():
+        vocab.setdefault(variant, target)
+    return vocab
+
+
+_FORMS = _vocabulary(CANONICAL_FORMS, FORM_VARIANTS)
+_UNITS = _vocabulary(CANONICAL_UNITS, UNIT_VARIANTS)
+_FORM_INDEX = DeleteIndex(_FORMS, threshold=FUZZY_THRESHOLD_FORM)
+_UNIT_INDEX = DeleteIndex(_UNITS, threshold=FUZZY_THRESHOLD_UNIT)
+
 
+@lru_cache(maxsize=NORMALIZER_CACHE_SIZE)
 def normalize_form_token(token: str) -> Optional[str]:
     """
     Map a potentially misspelled form token to a canonical form using fuzzy matching.
-    e.g. 'tlablet' -> 'tablet'
+    e.g. 'tlablet' -> 'tablet', 'tabletten' -> 'tablet'
     """
     token = token.lower().strip()
     if not token:
         return None
 
-    match = process.extractOne(token, CANONICAL_FORMS, scorer=fuzz.ratio)
-    if match:
-        word, score, _ = match
-        if score >= FUZZY_THRESHOLD_FORM:
-            return word
-    return None
+    match = _FORM_INDEX.best(token)
+    return _FORMS[match[0]] if match else None
 
 
+@lru_cache(maxsize=NORMALIZER_CACHE_SIZE)
 def normalize_unit_token(token: str) -> Optional[str]:
     """
     Map a potentially misspelled time unit token to a canonical unit.
-    e.g. 'dyas' -> 'day'
+    e.g. 'dyas' -> 'day', 'wochen' -> 'week'
     """
     token = token.lower().strip()
     if not token:
         return None
 
-    match = process.extractOne(token, CANONICAL_UNITS, scorer=fuzz.ratio)
-    if match:
-        word, score, _ = match
-        if score >= FUZZY_THRESHOLD_UNIT:
-            return word
-    return None
\ No newline at end of file
+    match = _UNIT_INDEX.best(token)
+    return _UNITS[match[0]] if match else None
@@ -23,8 +23,13 @@ def load_history() -> Dict[str, List[HistoryRow]]:
     by_patient: Dict[str, List[HistoryRow]] = {}
 
     with open(HISTORY_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        # The export starts with a title block; the table begins at its header row
+        lines = f.readlines()
+        start = next((i for i, line in enumerate(lines) if line.startswith("Patient ID,")), 0)
+        reader = csv.DictReader(lines[start:])
         for row in reader:
+            if not row.get("Patient ID"):
+                continue
             try:
                 qty = int(row["Quantity"])
             except ValueError:
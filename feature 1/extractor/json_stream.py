@@ -0,0 +1,69 @@
+"""Incremental parser for the LLM's {"medicines": [...]} output."""
+
+import json
+from typing import Any, Dict, List
+
+
+class MedicineArrayParser:
+    """
+    Feed model text as it streams in; `feed` returns every medicine object
+    that closed in that chunk.
+
+    Objects are recognised structurally: an object opened directly inside an
+    array inside the top-level object. Strings and escapes are tracked so
+    braces inside names do not confuse the depth count. Text before the
+    first "{" (e.g. chatter or code fences) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buf: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._obj_start = -1
+        self._pos = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for ch in chunk:
+            self._buf.append(ch)
+            pos = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._obj_start = pos
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._stack == ["{", "["] and self._obj_start != -1:
+                    obj = self._decode(self._obj_start, pos + 1)
+                    self._obj_start = -1
+                    if obj is not None:
+                        out.append(obj)
+        return out
+
+    def _decode(self, start: int, end: int):
+        text = "".join(self._buf[start:end])
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buf)
@@ -0,0 +1,217 @@
+"""
+Tiered language identification: en, de and (romanized) hi.
+
+1. Heuristic: Devanagari script, German letters and stop words settle
+   most messages in a few microseconds.
+2. Built-in char 1-3-gram naive Bayes classifier, trained at import from
+   extractor.langid_samples; no files, no network.
+3. Optional fastText model (LANGID_FASTTEXT_MODEL, e.g. lid.176.ftz),
+   loaded lazily once per process, for texts the classifier is unsure
+   about. Skipped if fasttext or the model file is missing.
+
+Everything else is reported as LANGID_DEFAULT.
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .langid_samples import SAMPLES
+from .log import get_logger
+
+LANGUAGES = ("en", "de", "hi")
+LANGID_DEFAULT = os.getenv("LANGID_DEFAULT", "en")
+LANGID_FASTTEXT_MODEL = os.getenv("LANGID_FASTTEXT_MODEL", "")
+LANGID_MIN_MARGIN = 0.1  # log-probability gap per n-gram the classifier must reach
+WORD_CACHE_SIZE = 50000  # per-word scores kept by the classifier (plain dict, never evicted)
+
+DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+GERMAN_LETTERS = re.compile(r"[äöüß]")
+WORD = re.compile(r"[^\W\d_]+")
+
+STOP_WORDS: Dict[str, frozenset] = {
+    "en": frozenset(
+        "i need please can you send me some the a an and for my of to is it this with would like "
+        "want have get order thanks thank how much what when where once twice times day daily "
+        "needed pack packs box boxes strips".split()
+    ),
+    "de": frozenset(
+        "ich brauche bitte können sie mir eine einen und für mein meine der die das ist mit "
+        "möchte mochte hätte gerne haben danke wie viel was wann wo nicht auch noch hallo "
+        "einmal zweimal dreimal am tag täglich bei bedarf packung packungen".split()
+    ),
+    "hi": frozenset(
+        "mujhe chahiye bhej do dijiye ke ki ka hai hain mein aur liye kya ye wo mera meri "
+        "bhaiya dena kar karo nahi baar din wali se par ek teen zarurat dabba dawai goli".split()
+    ),
+}
+# Words shared between the lists (e.g. "die", "do") are not evidence
+_SHARED = frozenset(w for lang in LANGUAGES for w in STOP_WORDS[lang] if sum(w in STOP_WORDS[o] for o in LANGUAGES) > 1)
+
+
+def heuristic(text: str) -> Optional[str]:
+    """
+    The language if the text makes it obvious, else None.
+    """
+    if DEVANAGARI.search(text):
+        return "hi"
+    lowered = text.lower()
+    counts = {lang: 0 for lang in LANGUAGES}
+    for word in WORD.findall(lowered):
+        if word in _SHARED:
+            continue
+        for lang in LANGUAGES:
+            if word in STOP_WORDS[lang]:
+                counts[lang] += 1
+    if GERMAN_LETTERS.search(lowered):
+        counts["de"] += 2
+    ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
+    (best, top), (_, second) = ranked[0], ranked[1]
+    if top >= 2 and top >= 2 * second:
+        return best
+    return None
+
+
+def _word_ngrams(word: str) -> List[str]:
+    padded = f" {word} "
+    return [padded[i : i + n] for n in (1, 2, 3) for i in range(len(padded) - n + 1)]
+
+
+def _ngrams(text: str) -> List[str]:
+    return [g for word in WORD.findall(text.lower()) for g in _word_ngrams(word)]
+
+
+class NgramClassifier:
+    """
+    Multinomial naive Bayes over character 1-3-grams (with word boundary
+    padding) and add-one smoothing.
+    """
+
+    def __init__(self, samples: Dict[str, Sequence[str]]):
+        self.languages = list(samples)
+        counts = {lang: Counter(g for s in texts for g in _ngrams(s)) for lang, texts in samples.items()}
+        vocab = set().union(*counts.values())
+        totals = [sum(counts[lang].values()) + len(vocab) + 1 for lang in self.languages]
+        # n-gram -> log-probability per language, in self.languages order
+        self._log_prob: Dict[str, Tuple[float, ...]] = {
+            g: tuple(math.log((counts[lang][g] + 1) / t) for lang, t in zip(self.languages, totals))
+            for g in vocab
+        }
+        self._unseen = tuple(math.log(1 / t) for t in totals)
+        self._word_cache: Dict[str, Tuple[Tuple[float, ...], int]] = {}
+
+    def _word_scores(self, word: str) -> Tuple[Tuple[float, ...], int]:
+        """
+        (summed log-probabilities per language, n-gram count) for one word;
+        memoized, since order texts reuse a small vocabulary.
+        """
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+        sums = [0.0] * len(self.languages)
+        grams = _word_ngrams(word)
+        for g in grams:
+            for i, value in enumerate(self._log_prob.get(g, self._unseen)):
+                sums[i] += value
+        result = (tuple(sums), len(grams))
+        if len(self._word_cache) < WORD_CACHE_SIZE:
+            self._word_cache[word] = result
+        return result
+
+    def scores(self, text: str) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        ([(language, log-likelihood)] best first, number of n-grams).
+        """
+        sums = [0.0] * len(self.languages)
+        n = 0
+        for word in WORD.findall(text.lower()):
+            word_sums, count = self._word_scores(word)
+            n += count
+            for i, value in enumerate(word_sums):
+                sums[i] += value
+        out = sorted(zip(self.languages, sums), key=lambda kv: kv[1], reverse=True)
+        return out, n
+
+    def classify(self, text: str, min_margin: float = LANGID_MIN_MARGIN) -> Optional[str]:
+        """
+        The best language, or None if it does not beat the runner-up by
+        `min_margin` per n-gram.
+        """
+        ranked, n = self.scores(text)
+        if not n:
+            return None
+        if (ranked[0][1] - ranked[1][1]) / n < min_margin:
+            return None
+        return ranked[0][0]
+
+
+classifier = NgramClassifier(SAMPLES)
+
+log = get_logger(__name__)
+
+_fasttext_model = None
+_fasttext_failed = False
+_fasttext_lock = threading.Lock()
+
+
+def _load_fasttext():
+    """
+    The fastText model, loaded on first use; None if not configured or not
+    loadable (then never retried).
+    """
+    global _fasttext_model, _fasttext_failed
+    if _fasttext_model is not None or _fasttext_failed:
+        return _fasttext_model
+    with _fasttext_lock:
+        if _fasttext_model is None and not _fasttext_failed:
+            if not LANGID_FASTTEXT_MODEL or not os.path.exists(LANGID_FASTTEXT_MODEL):
+                _fasttext_failed = True
+                return None
+            try:
+                import fasttext  # optional dependency
+
+                _fasttext_model = fasttext.load_model(LANGID_FASTTEXT_MODEL)
+            except Exception:
+                _fasttext_failed = True
+    return _fasttext_model
+
+
+def fasttext_predict(texts: Sequence[str]) -> List[Optional[str]]:
+    """
+    One batched fastText query; None for texts it labels outside LANGUAGES
+    (or for all of them when no model is available or the query fails).
+    """
+    model = _load_fasttext()
+    if model is None or not texts:
+        return [None] * len(texts)
+    try:
+        labels, _ = model.predict([" ".join(t.split()) for t in texts])
+    except Exception as exc:  # a broken model must not fail the order
+        log.warning("fasttext predict failed", extra={"fields": {"error": repr(exc)}})
+        return [None] * len(texts)
+    out: List[Optional[str]] = []
+    for label in labels:
+        lang = label[0].replace("__label__", "") if label else ""
+        out.append(lang if lang in LANGUAGES else None)
+    return out
+
+
+def identify_batch(texts: Sequence[str]) -> List[str]:
+    """
+    Language of each text through the tiers; texts left undecided by the
+    first two go to fastText in one batch.
+    """
+    results: List[Optional[str]] = []
+    pending: List[int] = []
+    for i, text in enumerate(texts):
+        lang = heuristic(text) or classifier.classify(text)
+        results.append(lang)
+        if lang is None:
+            pending.append(i)
+    if pending:
+        for i, lang in zip(pending, fasttext_predict([texts[i] for i in pending])):
+            results[i] = lang
+    return [lang or LANGID_DEFAULT for lang in results]
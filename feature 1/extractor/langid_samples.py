@@ -0,0 +1,109 @@
+"""
+Training sentences for the built-in char-n-gram language classifier
+(extractor.langid). Pharmacy-order phrasing plus everyday text, so the
+profiles cover the words customers actually type. Hindi is romanized, as
+customers write it in chat; Devanagari is detected by script.
+"""
+
+SAMPLES = {
+    "en": [
+        "i need two packs of paracetamol please",
+        "can you send me some cough syrup for my son",
+        "please deliver three boxes of vitamin d tablets",
+        "i would like to order my usual medicine again",
+        "how much does the nasal spray cost",
+        "my doctor prescribed this for my back pain",
+        "take one tablet twice a day after meals",
+        "is this available without a prescription",
+        "the last order arrived yesterday thank you",
+        "could you check if you have ibuprofen in stock",
+        "i am out of my blood pressure pills",
+        "send it to the same address as last time",
+        "one capsule every morning before breakfast",
+        "what is the price of the eye drops",
+        "i have a headache and a sore throat",
+        "please add magnesium and omega three to my order",
+        "for my mother who has trouble sleeping",
+        "when will the package be delivered",
+        "thanks for your help have a nice day",
+        "can i get the bigger pack this time",
+        "my child has a fever what should i take",
+        "apply the cream on the skin at night",
+        "the tablets should be taken with water",
+        "i think i ordered the wrong size",
+        "hello good morning i want to place an order",
+        "do you also sell bandages and plasters",
+        "cancel the previous order please",
+        "he needs something for his stomach",
+        "for five days then stop",
+        "where is my delivery it is late",
+    ],
+    "de": [
+        "ich brauche zwei packungen paracetamol bitte",
+        "können sie mir einen hustensaft für meinen sohn schicken",
+        "bitte liefern sie drei schachteln vitamin d tabletten",
+        "ich möchte mein übliches medikament noch einmal bestellen",
+        "wie viel kostet das nasenspray",
+        "mein arzt hat mir das gegen rückenschmerzen verschrieben",
+        "eine tablette zweimal täglich nach dem essen",
+        "ist das ohne rezept erhältlich",
+        "die letzte bestellung kam gestern an danke",
+        "haben sie ibuprofen auf lager",
+        "meine blutdrucktabletten sind aufgebraucht",
+        "schicken sie es an die gleiche adresse wie letztes mal",
+        "eine kapsel jeden morgen vor dem frühstück",
+        "was kosten die augentropfen",
+        "ich habe kopfschmerzen und halsschmerzen",
+        "bitte magnesium und omega drei zur bestellung hinzufügen",
+        "für meine mutter die schlecht schläft",
+        "wann wird das paket geliefert",
+        "vielen dank für ihre hilfe schönen tag noch",
+        "kann ich diesmal die größere packung bekommen",
+        "mein kind hat fieber was soll ich nehmen",
+        "die creme abends auf die haut auftragen",
+        "die tabletten mit wasser einnehmen",
+        "ich glaube ich habe die falsche größe bestellt",
+        "hallo guten morgen ich möchte etwas bestellen",
+        "verkaufen sie auch verbände und pflaster",
+        "bitte die vorherige bestellung stornieren",
+        "er braucht etwas für den magen",
+        "fünf tage lang dann aufhören",
+        "wo bleibt meine lieferung sie ist spät",
+        "einmal am tag bei bedarf",
+        "ich hätte gerne die tropfen und den sirup",
+    ],
+    "hi": [
+        "mujhe paracetamol ke do pack chahiye",
+        "mere bete ke liye khansi ki dawai bhej do",
+        "vitamin d ki teen dabbi bhej dijiye",
+        "meri roz wali dawai phir se mangwani hai",
+        "nasal spray kitne ka hai",
+        "doctor ne kamar dard ke liye ye likha hai",
+        "din mein do baar khane ke baad ek goli",
+        "kya ye bina parchi ke milti hai",
+        "pichla order kal aa gaya dhanyavaad",
+        "kya aapke paas ibuprofen hai",
+        "meri bp ki goliyan khatam ho gayi hain",
+        "usi pate par bhej dena jaisa pichli baar",
+        "roz subah nashte se pehle ek capsule",
+        "aankh ki boond ki keemat kya hai",
+        "mere sar mein dard hai aur gala kharab hai",
+        "order mein magnesium aur omega bhi daal do",
+        "meri maa ke liye jinko neend nahi aati",
+        "parcel kab tak aayega",
+        "madad ke liye shukriya",
+        "is baar bada pack mil sakta hai kya",
+        "bachche ko bukhar hai kya lena chahiye",
+        "raat ko cream twacha par lagana",
+        "goli paani ke saath leni hai",
+        "lagta hai maine galat size mangwa liya",
+        "namaste bhaiya mujhe order dena hai",
+        "kya aap patti bhi bechte ho",
+        "pichla order cancel kar do",
+        "usko pet ke liye kuch chahiye",
+        "paanch din tak phir band kar dena",
+        "meri delivery kahan hai der ho gayi",
+        "zarurat par din mein ek baar",
+        "bhaiya ye dawai de dijiye",
+    ],
+}
@@ -1,19 +1,67 @@
-from typing import Literal
+import threading
+from collections import OrderedDict
+from typing import List, Literal, Optional, Sequence
 
-SupportedLanguage = Literal["en", "unknown"]
+from .catalog import CatalogSnapshot, current_catalog
+from .langid import identify_batch
+from .translation_memory import translate
 
-def detect_language(text: str) -> SupportedLanguage:
+SupportedLanguage = Literal["en", "de", "hi", "unknown"]
+
+LANGUAGE_CACHE_SIZE = 4096
+
+# text -> language, shared by detect_language and detect_languages
+_memo: "OrderedDict[str, SupportedLanguage]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def detect_languages(texts: Sequence[str]) -> List[SupportedLanguage]:
     """
-    Very naive placeholder. Later you can plug in a model or API.
+    Language of each message (see extractor.langid for the tiers).
+
+    Memoized: repeated messages are answered without running the tiers,
+    and the rest are identified together, so an optional fastText model is
+    queried once per call.
     """
-    if not text:
-        return "unknown"
-    # For hackathon v1, assume English.
-    return "en"
+    results: List[SupportedLanguage] = []
+    todo: List[str] = []
+    with _memo_lock:
+        for text in texts:
+            if not text or not text.strip():
+                results.append("unknown")
+            elif text in _memo:
+                _memo.move_to_end(text)
+                results.append(_memo[text])
+            else:
+                results.append("unknown")
+                todo.append(text)
+    if not todo:
+        return results
 
-def translate_to_english(text: str, lang: SupportedLanguage) -> str:
+    distinct = list(dict.fromkeys(todo))
+    found = dict(zip(distinct, identify_batch(distinct)))
+    with _memo_lock:
+        for text, lang in found.items():
+            _memo[text] = lang
+        while len(_memo) > LANGUAGE_CACHE_SIZE:
+            _memo.popitem(last=False)
+    return [found.get(text, lang) for text, lang in zip(texts, results)]
+
+
+def detect_language(text: str) -> SupportedLanguage:
+    return detect_languages([text])[0]
+
+
+def translate_to_english(
+    text: str, lang: SupportedLanguage, snap: Optional[CatalogSnapshot] = None
+) -> str:
     """
-    If the text is not English, translate it. For now, just return text.
-    In the future, call a translation API or model here.
+    Rewrite German / Hindi pharmacy phrasing (numbers, frequencies, units,
+    forms) in English with the translation memory, so the rule-based
+    extractors understand it. English text only gets unambiguous
+    multi-word phrases. Words of catalog product names are kept as typed.
     """
-    return text or ""
\ No newline at end of file
+    if not text:
+        return ""
+    snap = snap or current_catalog()
+    return translate(text, lang, protected=snap.token_index.contains)
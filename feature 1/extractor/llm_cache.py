@@ -0,0 +1,167 @@
+"""Two-tier (memory LRU + SQLite) cache for LLM extraction results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "1024"))
+LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+
+_EVICT_EVERY = 100  # disk size check every N writes
+
+
+def prompt_version(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMCache:
+    """
+    Memory LRU in front of a SQLite table.
+
+    Entries are scoped to (model, prompt_version): rows written under another
+    model or prompt never match a key and are dropped when the cache opens.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: str,
+        prompt_version: str,
+        ttl: float = LLM_CACHE_TTL,
+        memory_size: int = LLM_CACHE_MEMORY_SIZE,
+        max_rows: int = LLM_CACHE_MAX_ROWS,
+    ):
+        self.path = path
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE model != ? OR prompt_version != ?",
+            (model, prompt_version),
+        )
+        self._db.commit()
+
+    def key_for(self, normalized_text: str) -> str:
+        raw = "\x1f".join((self.model, self.prompt_version, normalized_text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, normalized_text: str) -> Optional[Dict[str, Any]]:
+        key = self.key_for(normalized_text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            value = json.loads(row[0])
+            self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[1], value)
+            self.hits_disk += 1
+            return value
+
+    def put(self, normalized_text: str, value: Dict[str, Any]) -> None:
+        key = self.key_for(normalized_text)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.model, self.prompt_version, json.dumps(value), now, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute(
+            """
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_rows,),
+        )
+
+    def purge(self) -> int:
+        """
+        Drop every entry from both tiers; returns the number of disk rows removed.
+        """
+        with self._lock:
+            self._memory.clear()
+            removed = self._db.execute("DELETE FROM llm_cache").rowcount
+            self._db.commit()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            disk_rows = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "model": self.model,
+                "prompt_version": self.prompt_version,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_rows,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            }
@@ -1,25 +1,141 @@
+import asyncio
 import json
-from typing import Dict, Any, List
+import os
+import time
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 import httpx
 
+from .circuit import CircuitBreaker
+from .json_stream import MedicineArrayParser
+from .llm_cache import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLMCache, prompt_version
+from .preprocess import normalize_text
+
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "llama3"  # change if you use a different model
 
-client = httpx.Client(timeout=120.0)
+# Ollama serves OLLAMA_NUM_PARALLEL generations at once; more in-flight
+# requests only queue on the server, so cap them here instead.
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "4"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", str(OLLAMA_CONCURRENCY * 2)))
+OLLAMA_TIMEOUT = 120.0
+
+# Default per-request latency budget for the LLM fallback; requests may
+# override it. When it runs out the rule-based result is returned instead.
+LLM_BUDGET_S = float(os.getenv("LLM_BUDGET_S", "15"))
+
+# Stop calling Ollama after this many consecutive failures/timeouts and
+# probe it again every LLM_BREAKER_RESET_S seconds.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+client = httpx.Client(timeout=OLLAMA_TIMEOUT)
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_S)
+
+_async_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+_waiters: Dict[str, int] = {}
 
 
-def _call_ollama(prompt: str) -> Dict[str, Any]:
-    payload = {
+def _payload(prompt: str, stream: bool = False) -> Dict[str, Any]:
+    return {
         "model": MODEL_NAME,
         "prompt": prompt,
-        "stream": False,
+        "stream": stream,
     }
-    resp = client.post(OLLAMA_URL, json=payload)
+
+
+def _call_ollama(prompt: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Blocking generate call that finishes within `timeout` seconds overall.
+
+    httpx timeouts bound each connect/read separately, so the generation is
+    streamed and the deadline checked between chunks. Running out of the
+    caller's `timeout` raises TimeoutError; httpx timeouts only escape for
+    Ollama's own OLLAMA_TIMEOUT. Returns the same {"response": <model text>}
+    shape as a non-streamed call.
+    """
+    budget = min(timeout or OLLAMA_TIMEOUT, OLLAMA_TIMEOUT)
+    deadline = time.monotonic() + budget
+    parts: List[str] = []
+    try:
+        with client.stream("POST", OLLAMA_URL, json=_payload(prompt, stream=True), timeout=budget) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"no complete response within {budget:.1f}s")
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                parts.append(chunk.get("response") or "")
+                if chunk.get("done"):
+                    break
+    except httpx.TimeoutException as exc:
+        if budget < OLLAMA_TIMEOUT:  # the caller's deadline, not a slow Ollama
+            raise TimeoutError(f"no complete response within {budget:.1f}s") from exc
+        raise
+    llm_breaker.record_success()
+    return {"response": "".join(parts)}
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client, _semaphore
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            timeout=OLLAMA_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_CONCURRENCY,
+            ),
+        )
+        _semaphore = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+    return _async_client
+
+
+async def aclose_async_client() -> None:
+    global _async_client, _semaphore
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+    _semaphore = None
+    _inflight.clear()
+    _waiters.clear()
+
+
+async def _generate_async(prompt: str) -> Dict[str, Any]:
+    async_client = _get_async_client()
+    async with _semaphore:
+        resp = await async_client.post(OLLAMA_URL, json=_payload(prompt))
     resp.raise_for_status()
+    llm_breaker.record_success()
     return resp.json()
 
 
+async def _call_ollama_async(prompt: str) -> Dict[str, Any]:
+    """
+    Single-flight: identical prompts in flight at the same time share one
+    generation. The shared task is shielded so one caller timing out does
+    not cancel it for the others; once every caller has given up it is
+    cancelled so it stops holding an Ollama slot.
+    """
+    task = _inflight.get(prompt)
+    if task is None:
+        task = asyncio.ensure_future(_generate_async(prompt))
+        _inflight[prompt] = task
+        task.add_done_callback(lambda _: _inflight.pop(prompt, None))
+    _waiters[prompt] = _waiters.get(prompt, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        _waiters[prompt] -= 1
+        if not _waiters[prompt]:
+            del _waiters[prompt]
+            if not task.done():
+                task.cancel()
+
+
 def _build_prompt(user_text: str) -> str:
     return f"""
 You are a pharmacy assistant. Extract medicine orders from the user's text
@@ -53,10 +169,62 @@ Rules:
 """.strip()
 
 
-def llm_extract_order(user_text: str) -> Dict[str, Any]:
-    prompt = _build_prompt(user_text)
-    raw = _call_ollama(prompt)
+def _build_span_prompt(spans: List[Dict[str, Any]]) -> str:
+    """
+    Short prompt for partial fallback: only the text around medicines the
+    rules could not resolve, and only the fields still missing.
+    """
+    lines = [
+        f'{s["id"]}. medicine: "{s["medicine"]}"; text: "{s["text"]}"; missing: {", ".join(s["missing"])}'
+        for s in spans
+    ]
+    items = "\n".join(lines)
+    return f"""
+Fill in missing fields of pharmacy order lines. Return STRICT JSON only.
+
+{items}
+
+Return {{"items": [{{"id": <id>, <only the missing fields>}}]}}
+Fields: strength ('500mg'), form ('tablet'), frequency ('twice daily'),
+duration ('5 days'), quantity (integer, total units). Use null if unsure.
+""".strip()
+
+
+# Hash of the prompt templates; editing them invalidates cached results
+PROMPT_VERSION = prompt_version(
+    _build_prompt("{user_text}")
+    + _build_span_prompt([{"id": 0, "medicine": "{medicine}", "text": "{text}", "missing": ["{missing}"]}])
+)
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[LLMCache]:
+    if not LLM_CACHE_ENABLED:
+        return None
+    return LLMCache(LLM_CACHE_PATH, MODEL_NAME, PROMPT_VERSION)
+
+
+def _cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Empty results are not cached: unparseable model output ends up as one,
+    and the next attempt may well succeed.
+    """
+    return any(result.values())
+
+
+def _normalize_medicine(m: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "raw_name": m.get("raw_name"),
+        "canonical_name": m.get("canonical_name"),
+        "strength": m.get("strength"),
+        "form": m.get("form"),
+        "frequency": m.get("frequency"),
+        "duration": m.get("duration"),
+        "quantity": m.get("quantity"),
+    }
 
+
+def _extract_json(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     # Ollama's /generate response body has a "response" field containing the model text
     # Adjust if your Ollama version returns a different field.
     model_text = raw.get("response") or raw.get("output") or ""
@@ -73,8 +241,15 @@ def llm_extract_order(user_text: str) -> Dict[str, Any]:
         if start != -1 and end != -1 and end > start:
             parsed = json.loads(model_text[start : end + 1])
         else:
-            # If completely unusable, return empty result so caller falls back to rule-based output.
-            return {"medicines": []}
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _parse_model_response(raw: Dict[str, Any]) -> Dict[str, Any]:
+    parsed = _extract_json(raw)
+    if parsed is None:
+        # If completely unusable, return empty result so caller falls back to rule-based output.
+        return {"medicines": []}
 
     # Ensure expected shape
     meds = parsed.get("medicines", [])
@@ -86,16 +261,134 @@ def llm_extract_order(user_text: str) -> Dict[str, Any]:
     for m in meds:
         if not isinstance(m, dict):
             continue
-        normalized_meds.append(
-            {
-                "raw_name": m.get("raw_name"),
-                "canonical_name": m.get("canonical_name"),
-                "strength": m.get("strength"),
-                "form": m.get("form"),
-                "frequency": m.get("frequency"),
-                "duration": m.get("duration"),
-                "quantity": m.get("quantity"),
-            }
-        )
+        normalized_meds.append(_normalize_medicine(m))
+
+    return {"medicines": normalized_meds}
+
+
+def llm_extract_order(user_text: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    cache = get_llm_cache()
+    cache_text = normalize_text(user_text)
+    if cache is not None:
+        cached = cache.get(cache_text)
+        if cached is not None:
+            return cached
+
+    prompt = _build_prompt(user_text)
+    raw = _call_ollama(prompt, timeout=timeout)
+    result = _parse_model_response(raw)
+
+    if cache is not None and _cacheable(result):
+        cache.put(cache_text, result)
+    return result
+
+
+async def llm_extract_order_async(user_text: str) -> Dict[str, Any]:
+    # SQLite lookups and writes run off the event loop
+    cache = get_llm_cache()
+    cache_text = normalize_text(user_text)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_text)
+        if cached is not None:
+            return cached
+
+    prompt = _build_prompt(user_text)
+    raw = await _call_ollama_async(prompt)
+    result = _parse_model_response(raw)
+
+    if cache is not None and _cacheable(result):
+        await asyncio.to_thread(cache.put, cache_text, result)
+    return result
+
+
+def _parse_span_response(raw: Dict[str, Any]) -> Dict[str, Any]:
+    parsed = _extract_json(raw)
+    items = parsed.get("items", []) if parsed else []
+    if not isinstance(items, list):
+        items = []
+    return {"items": [item for item in items if isinstance(item, dict) and "id" in item]}
+
+
+def _span_cache_text(spans: List[Dict[str, Any]]) -> str:
+    return "spans:" + json.dumps(spans, sort_keys=True)
+
+
+def llm_fill_spans(spans: List[Dict[str, Any]], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Partial fallback: ask only for the missing fields of the given spans.
+    Returns {"items": [{"id": ..., "<field>": ...}]}.
+    """
+    cache = get_llm_cache()
+    cache_text = _span_cache_text(spans)
+    if cache is not None:
+        cached = cache.get(cache_text)
+        if cached is not None:
+            return cached
+
+    raw = _call_ollama(_build_span_prompt(spans), timeout=timeout)
+    result = _parse_span_response(raw)
+
+    if cache is not None and _cacheable(result):
+        cache.put(cache_text, result)
+    return result
+
+
+async def llm_fill_spans_async(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    cache = get_llm_cache()
+    cache_text = _span_cache_text(spans)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_text)
+        if cached is not None:
+            return cached
+
+    raw = await _call_ollama_async(_build_span_prompt(spans))
+    result = _parse_span_response(raw)
+
+    if cache is not None and _cacheable(result):
+        await asyncio.to_thread(cache.put, cache_text, result)
+    return result
+
+
+async def llm_stream_medicines(user_text: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of llm_extract_order: yields each medicine dict as
+    soon as its JSON object closes in Ollama's token stream.
+
+    Cache hits are replayed immediately; a completed stream that found
+    medicines is cached like a regular call. Streams are not coalesced.
+    """
+    cache = get_llm_cache()
+    cache_text = normalize_text(user_text)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_text)
+        if cached is not None:
+            for m in cached.get("medicines", []):
+                yield m
+            return
+
+    prompt = _build_prompt(user_text)
+    parser = MedicineArrayParser()
+    meds: List[Dict[str, Any]] = []
+    done = False
+
+    async_client = _get_async_client()
+    async with _semaphore:
+        async with async_client.stream("POST", OLLAMA_URL, json=_payload(prompt, stream=True)) as resp:
+            resp.raise_for_status()
+            # Ollama streams one JSON object per line: {"response": "<tokens>", "done": bool}
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                for m in parser.feed(chunk.get("response") or ""):
+                    med = _normalize_medicine(m)
+                    meds.append(med)
+                    yield med
+                if chunk.get("done"):
+                    done = True
+                    break
 
-    return {"medicines": normalized_meds}
\ No newline at end of file
+    if done:
+        llm_breaker.record_success()
+    if done and meds and cache is not None:
+        await asyncio.to_thread(cache.put, cache_text, {"medicines": meds})
@@ -0,0 +1,199 @@
+"""
+Structured, non-blocking logging for the extraction pipeline.
+
+Records are JSON lines. Handlers never run on the request thread: the
+loggers put records on a queue and a QueueListener thread formats and
+writes them. Debug traces on the hot path are sampled
+(LOG_DEBUG_SAMPLE_RATE). A request that sends the TRACE_HEADER header is
+always traced (see trace_request). Call sites check `tracing()` before
+they build any fields, so untraced requests pay for one random() call.
+
+Worker processes log into a multiprocessing queue (worker_log_queue) that
+a second listener in the parent drains into the same handler.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+TRACE_HEADER = "X-Debug-Trace"
+
+_trace: contextvars.ContextVar[bool] = contextvars.ContextVar("trace", default=False)
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+_worker_queue: Optional[multiprocessing.Queue] = None
+_worker_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def trace_request(enabled: bool) -> contextvars.Token:
+    """
+    Force debug traces for the current request (context); returns the token
+    for contextvars reset.
+    """
+    return _trace.set(enabled)
+
+
+def reset_trace(token: contextvars.Token) -> None:
+    _trace.reset(token)
+
+
+def trace_forced() -> bool:
+    """
+    Whether the current request asked for a trace; pass it along with work
+    sent to another process.
+    """
+    return _trace.get()
+
+
+def tracing() -> bool:
+    """
+    Whether this call site should emit its debug trace: always for traced
+    requests, otherwise for a LOG_DEBUG_SAMPLE_RATE sample.
+    """
+    if _trace.get():
+        return True
+    return LOG_DEBUG_SAMPLE_RATE > 0 and random.random() < LOG_DEBUG_SAMPLE_RATE
+
+
+def debug(logger: logging.Logger, event: str, **fields: Any) -> None:
+    """
+    Emit a debug trace. Traced records bypass the logger level, so a
+    per-request trace works while LOG_LEVEL stays at INFO.
+    """
+    record = logger.makeRecord(logger.name, logging.DEBUG, "", 0, event, (), None, extra={"fields": fields})
+    logger.handle(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DropWhenFull(logging.handlers.QueueHandler):
+    """
+    Never block the caller: if the writer falls behind, records are dropped
+    and counted instead.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DropWhenFull.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only freeze the message
+        record.msg = record.getMessage()
+        record.args = ()
+        return record
+
+
+class _ProcessQueueHandler(_DropWhenFull):
+    """
+    _DropWhenFull for a worker process: records cross a process boundary,
+    so tracebacks and fields are reduced to what pickles.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.fields = json.loads(json.dumps(fields, default=str))
+        return record
+
+
+def configure_logging(stream=None) -> None:
+    """
+    Route the root logger through a bounded queue to a JSON stream handler
+    on a background thread. Idempotent; stop with shutdown_logging().
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    _handler = handler
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [_DropWhenFull(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+
+def worker_log_queue() -> Optional[multiprocessing.Queue]:
+    """
+    Queue for worker processes to log into (pass it to
+    configure_worker_logging in the worker's initializer). Records are
+    written by this process's handler. None if logging is not configured.
+    """
+    global _worker_queue, _worker_listener
+    if _handler is None:
+        return None
+    if _worker_queue is None:
+        _worker_queue = multiprocessing.Queue(maxsize=LOG_QUEUE_SIZE)
+        _worker_listener = logging.handlers.QueueListener(_worker_queue, _handler, respect_handler_level=True)
+        _worker_listener.start()
+    return _worker_queue
+
+
+def configure_worker_logging(log_queue: Optional[multiprocessing.Queue]) -> None:
+    """
+    Route a worker process's root logger to the parent's worker_log_queue.
+    A forked worker inherits the parent's queue handler, whose listener
+    thread does not exist in the child, so it is always replaced.
+    """
+    global _listener, _handler, _worker_queue, _worker_listener
+    _listener = _handler = _worker_queue = _worker_listener = None
+    root = logging.getLogger()
+    root.handlers = [_ProcessQueueHandler(log_queue)] if log_queue is not None else []
+    root.setLevel(LOG_LEVEL)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the writer threads.
+    """
+    global _listener, _handler, _worker_queue, _worker_listener
+    if _worker_listener is not None:
+        _worker_listener.stop()
+        _worker_queue.close()
+    _worker_queue = _worker_listener = None
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = _handler = None
+
@@ -1,24 +1,142 @@
 import os
-from functools import lru_cache
-from typing import List, Tuple, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, List, Tuple, Dict, Optional, Sequence
 
+import numpy as np
 from rapidfuzz import fuzz, process
 
+from .catalog import CatalogSnapshot, current_catalog
+from .name_index import NameIndex
 from .preprocess import normalize_text
-from .product_index import product_name_list
+from .spelling import correct_words
+from .symspell import DeleteIndex
 
 FUZZY_THRESHOLD = 85  # 0–100, tweakable
 
+# "index": score n-grams one by one against a NameIndex shortlist
+# "cdist": score all n-grams in one rapidfuzz.process.cdist call per first char
+# "auto":  cdist once a message yields at least CDIST_MIN_NGRAMS n-grams
+MATCH_MODE = os.getenv("MEDICINE_MATCH_MODE", "auto")
+CDIST_MIN_NGRAMS = 300
+CDIST_CHUNK_ROWS = 256  # bounds the score matrix size for very long texts
+
+# Correct user words against catalog tokens and score only n-grams that
+# start and end on a catalog word (see _corrected_ngrams): "1", "0" or
+# "auto" = only for catalogs of SPELL_CORRECT_MIN_NAMES names or more.
+# Below that it buys a few points of recall for precision and latency
+# (python -m benchmarks.typo_recall).
+SPELL_CORRECT = os.getenv("MEDICINE_SPELL_CORRECT", "auto")
+SPELL_CORRECT_MIN_NAMES = int(os.getenv("MEDICINE_SPELL_CORRECT_MIN_NAMES", "10000"))
+
+# Cross-request memo of phrase -> best catalog match (0 disables it)
+PHRASE_MEMO_SIZE = int(os.getenv("MEDICINE_PHRASE_MEMO_SIZE", "100000"))
+
+Match = Optional[Tuple[str, float]]  # (canonical name, score), None = no match
+
+
+class PhraseMemo:
+    """
+    Thread-safe LRU of n-gram -> best match, including negative results.
+
+    Orders repeat the same phrases all day, so most n-grams are answered
+    here without touching the catalog. Entries belong to one NameIndex,
+    i.e. one catalog snapshot; a lookup against another index clears the
+    memo. The index object is compared, not the version string, so a
+    snapshot swapped in with a reused version cannot read stale matches.
+    """
+
+    def __init__(self, max_size: int = PHRASE_MEMO_SIZE):
+        self.max_size = max_size
+        self.index: Optional[NameIndex] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, Match]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, phrases: List[str], index: NameIndex) -> Tuple[Dict[str, Match], List[str]]:
+        """
+        (memoized matches, phrases still to score) for `phrases` against `index`.
+        """
+        found: Dict[str, Match] = {}
+        missing: List[str] = []
+        with self._lock:
+            if index is not self.index:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.index = index
+            for phrase in phrases:
+                if phrase in self._entries:
+                    self._entries.move_to_end(phrase)
+                    found[phrase] = self._entries[phrase]
+                else:
+                    missing.append(phrase)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, matches: Dict[str, Match], index: NameIndex) -> None:
+        with self._lock:
+            if index is not self.index:
+                return  # the catalog changed while these were scored
+            self._entries.update(matches)
+            overflow = len(self._entries) - self.max_size
+            for _ in range(max(0, overflow)):
+                self._entries.popitem(last=False)
+            self.evictions += max(0, overflow)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+phrase_memo = PhraseMemo()
+
+
+def spell_correct(snap: CatalogSnapshot) -> bool:
+    """
+    Whether extract_medicines spell-corrects by default for this catalog.
+    """
+    if SPELL_CORRECT == "auto":
+        return len(snap.medicine_names) >= SPELL_CORRECT_MIN_NAMES
+    return SPELL_CORRECT == "1"
+
 
-@lru_cache(maxsize=1)
 def _load_medicine_names() -> List[str]:
     """
-    Load normalized product names from products-export.csv via product_index.
+    Normalized product names of the live catalog snapshot.
+    """
+    return current_catalog().medicine_names
+
+
+def _load_name_index() -> NameIndex:
+    """
+    Length-bucketed index over the normalized product names, built once per catalog.
+    """
+    return current_catalog().name_index
+
+
+def _load_token_index() -> DeleteIndex:
+    """
+    Typo index over the words of the normalized product names.
     """
-    names: List[str] = []
-    for name in product_name_list():
-        names.append(normalize_text(name))
-    return names
+    return current_catalog().token_index
 
 
 def _generate_ngrams(words: List[str], max_n: int = 3) -> List[str]:
@@ -35,42 +153,173 @@ def _generate_ngrams(words: List[str], max_n: int = 3) -> List[str]:
     return phrases
 
 
-def extract_medicines(text: str) -> List[Tuple[str, str]]:
+def _corrected_ngrams(
+    words: List[str], max_n: int = 3, index: Optional[DeleteIndex] = None
+) -> Dict[str, str]:
     """
-    Fuzzy matching implementation using rapidfuzz against real product names
-    from products-export.csv.
+    Spell-corrected n-grams -> the original phrase they came from.
 
-    Returns:
-      List of (canonical_name, matched_phrase_in_text)
+    Each word is replaced by its closest catalog token. N-grams whose first
+    or last word matches no catalog token are dropped: they cannot be the
+    start or end of a product mention, and they are the bulk of the
+    n-grams in a chatty message. Inner words are kept as typed.
     """
-    norm_text = normalize_text(text)
-    if not norm_text:
-        return []
+    return _ngrams_from_corrections(words, correct_words(words, index or _load_token_index()), max_n)
 
-    medicine_names = _load_medicine_names()
-    words = norm_text.split()
-    ngrams = _generate_ngrams(words, max_n=3)
 
-    found_raw: List[Tuple[str, str, int]] = []  # (canonical, phrase, score)
+def _ngrams_from_corrections(
+    words: List[str], corrected: Sequence[Optional[str]], max_n: int = 3
+) -> Dict[str, str]:
+    """
+    _corrected_ngrams for words whose corrections (closest catalog token
+    per word, None for no match) are already known.
+    """
+    phrases: Dict[str, str] = {}
+    n_words = len(words)
+    for n in range(1, max_n + 1):
+        for i in range(n_words - n + 1):
+            j = i + n - 1
+            if corrected[i] is None or corrected[j] is None:
+                continue
+            phrase = " ".join(corrected[k] or words[k] for k in range(i, j + 1))
+            phrases.setdefault(phrase, " ".join(words[i : j + 1]))
+    return phrases
+
+
+def _match_phrase(phrase: str, index: NameIndex) -> Match:
+    """
+    (canonical name, score) of the best catalog match for one phrase, or None.
+    """
+    candidates = index.shortlist(phrase, FUZZY_THRESHOLD)
+    if not candidates:
+        return None
+
+    match = process.extractOne(
+        phrase,
+        candidates,
+        scorer=fuzz.ratio,
+        score_cutoff=FUZZY_THRESHOLD,
+    )
+    if not match:
+        return None
+    return match[0], match[1]
+
+
+def _match_ngrams(ngrams: List[str], index: NameIndex) -> List[Tuple[str, str, float]]:
+    """
+    Score every phrase against the index shortlist.
+
+    The shortlist keeps every name that could reach FUZZY_THRESHOLD (in
+    catalog order), so this returns the same matches as a full scan.
+    """
+    found_raw: List[Tuple[str, str, float]] = []  # (canonical, phrase, score)
 
     for phrase in ngrams:
-        # small pre-filter: only names starting with same first char as phrase
-        first = phrase[0]
-        candidates = [n for n in medicine_names if n and n[0] == first] or medicine_names
-
-        match = process.extractOne(
-            phrase,
-            candidates,
-            scorer=fuzz.ratio,
-        )
-        if not match:
+        match = _match_phrase(phrase, index)
+        if match:
+            found_raw.append((match[0], phrase, match[1]))
+
+    return found_raw
+
+
+def _cdist_scores(ngrams: List[str], index: NameIndex) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    (phrase rows, name ids, scores) of the phrases that reach
+    FUZZY_THRESHOLD, each with its best name; None if there are none.
+    """
+    if not ngrams:
+        return None
+
+    by_first: Dict[str, List[int]] = {}
+    for i, phrase in enumerate(ngrams):
+        by_first.setdefault(phrase[0], []).append(i)
+
+    rows: List[np.ndarray] = []
+    name_ids: List[np.ndarray] = []
+    scores: List[np.ndarray] = []
+
+    for first, phrase_ids in by_first.items():
+        candidate_ids, candidates = index.first_char_candidates(first)
+        if not candidates:
             continue
-        canonical_name, score, _ = match
-        if score >= FUZZY_THRESHOLD:
-            found_raw.append((canonical_name, phrase, score))
+        candidate_ids_arr = np.asarray(candidate_ids)
+        for start in range(0, len(phrase_ids), CDIST_CHUNK_ROWS):
+            chunk = np.asarray(phrase_ids[start : start + CDIST_CHUNK_ROWS])
+            matrix = process.cdist(
+                [ngrams[i] for i in chunk],
+                candidates,
+                scorer=fuzz.ratio,
+                score_cutoff=FUZZY_THRESHOLD,
+                dtype=np.float64,
+                workers=-1,
+            )
+            best_col = matrix.argmax(axis=1)
+            best_score = matrix[np.arange(len(chunk)), best_col]
+            hit = best_score >= FUZZY_THRESHOLD
+            rows.append(chunk[hit])
+            name_ids.append(candidate_ids_arr[best_col[hit]])
+            scores.append(best_score[hit])
+
+    if not rows:
+        return None
+
+    row_arr = np.concatenate(rows)
+    id_arr = np.concatenate(name_ids)
+    score_arr = np.concatenate(scores)
+    if not len(row_arr):
+        return None
+    return row_arr, id_arr, score_arr
+
+
+def _cdist_matches(ngrams: List[str], index: NameIndex) -> List[Match]:
+    """
+    _match_phrase for every phrase, scored with _cdist_scores.
+    """
+    matches: List[Match] = [None] * len(ngrams)
+    scored = _cdist_scores(ngrams, index)
+    if scored is not None:
+        for row, name_id, score in zip(*scored):
+            matches[row] = (index.names[name_id], float(score))
+    return matches
+
+
+def _extract_cdist(ngrams: List[str], index: NameIndex) -> List[Tuple[str, str]]:
+    """
+    Vectorized variant of _match_ngrams + _best_phrase_per_name.
+
+    Phrases are grouped by first character and scored against that group's
+    candidates with one multi-core cdist call; thresholding and the
+    best-phrase-per-name reduction then run on the score arrays.
+    np.argmax keeps the first maximum per row (extractOne's tie-breaking),
+    so the output is the same as the per-phrase loop.
+    """
+    scored = _cdist_scores(ngrams, index)
+    if scored is None:
+        return []
+    row_arr, id_arr, score_arr = scored
 
-    # Pick best-scoring phrase per canonical name
-    best_by_name: Dict[str, Tuple[str, int]] = {}
+    # Per name: highest score, earliest phrase on ties
+    order = np.lexsort((row_arr, -score_arr, id_arr))
+    sorted_ids = id_arr[order]
+    group_start = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    best = order[group_start]
+
+    # Per name: first phrase that matched it, which fixes the output order
+    first_order = np.lexsort((row_arr, id_arr))
+    first_row = row_arr[first_order[group_start]]
+
+    return [
+        (index.names[id_arr[k]], ngrams[row_arr[k]])
+        for k in best[np.argsort(first_row, kind="stable")]
+    ]
+
+
+def _best_phrase_per_name(found_raw: List[Tuple[str, str, float]]) -> List[Tuple[str, str]]:
+    """
+    Pick the best-scoring phrase per canonical name; the first phrase wins
+    ties, and names keep the order in which they were first matched.
+    """
+    best_by_name: Dict[str, Tuple[str, float]] = {}
     for canonical, phrase, score in found_raw:
         current = best_by_name.get(canonical)
         if current is None or score > current[1]:
@@ -81,3 +330,89 @@ def extract_medicines(text: str) -> List[Tuple[str, str]]:
         unique.append((canonical, phrase))
 
     return unique
+
+
+def _memo_lookup(
+    ngrams: List[str], mode: str, memo: PhraseMemo, snap: Optional[CatalogSnapshot] = None
+) -> Dict[str, Match]:
+    """
+    Match of every phrase through the phrase memo: only phrases the memo
+    does not know are scored (by `mode`), then remembered, misses included.
+    """
+    snap = snap or current_catalog()
+    found, missing = memo.lookup(ngrams, snap.name_index)
+    if missing:
+        if mode == "auto":
+            mode = "cdist" if len(missing) >= CDIST_MIN_NGRAMS else "index"
+        if mode == "cdist":
+            scored = dict(zip(missing, _cdist_matches(missing, snap.name_index)))
+        else:
+            scored = {phrase: _match_phrase(phrase, snap.name_index) for phrase in missing}
+        memo.store(scored, snap.name_index)
+        found.update(scored)
+    return found
+
+
+def _memo_matches(
+    ngrams: List[str], mode: str, memo: PhraseMemo, snap: CatalogSnapshot
+) -> List[Tuple[str, str, float]]:
+    """
+    _match_ngrams through the phrase memo.
+    """
+    found = _memo_lookup(ngrams, mode, memo, snap)
+    found_raw: List[Tuple[str, str, float]] = []
+    for phrase in ngrams:
+        match = found[phrase]
+        if match:
+            found_raw.append((match[0], phrase, match[1]))
+    return found_raw
+
+
+def extract_medicines(
+    text: str,
+    mode: Optional[str] = None,
+    correct: Optional[bool] = None,
+    snap: Optional[CatalogSnapshot] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Fuzzy matching implementation using rapidfuzz against real product names
+    from products-export.csv.
+
+    `correct` (default spell_correct(snap)) spell-corrects words against catalog
+    tokens first and scores only the surviving n-grams. N-gram matches are
+    remembered across calls (phrase_memo) unless PHRASE_MEMO_SIZE is 0.
+    `snap` defaults to the live catalog; callers that also look up products
+    pass their own so both see the same catalog version.
+
+    Returns:
+      List of (canonical_name, matched_phrase_in_text)
+    """
+    norm_text = normalize_text(text)
+    if not norm_text:
+        return []
+
+    snap = snap or current_catalog()
+    words = norm_text.split()
+    originals: Optional[Dict[str, str]] = None
+    if correct if correct is not None else spell_correct(snap):
+        originals = _corrected_ngrams(words, max_n=3, index=snap.token_index)
+        ngrams = list(originals)
+    else:
+        ngrams = _generate_ngrams(words, max_n=3)
+
+    mode = mode or MATCH_MODE
+    if PHRASE_MEMO_SIZE > 0:
+        found = _best_phrase_per_name(_memo_matches(ngrams, mode, phrase_memo, snap))
+    else:
+        index = snap.name_index
+        if mode == "auto":
+            mode = "cdist" if len(ngrams) >= CDIST_MIN_NGRAMS else "index"
+        if mode == "cdist":
+            found = _extract_cdist(ngrams, index)
+        else:
+            found = _best_phrase_per_name(_match_ngrams(ngrams, index))
+
+    if originals is None:
+        return found
+    # Report the phrase as it appears in the text, not the corrected form
+    return [(canonical, originals[phrase]) for canonical, phrase in found]
@@ -0,0 +1,175 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Small counters and histograms, enough for /metrics, without a client
+library. Stage timings of extract_order are collected per order in
+ParsedOrder.timings (seconds) and recorded here once the order is done,
+so timings measured in batch worker processes end up in the API
+process's histograms.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Copy per-stage timings (ms) into ParsedOrder.meta["timings_ms"]
+TIMINGS_IN_META = os.getenv("ORDER_TIMINGS_IN_META", "0") == "1"
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = STAGE_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, n + 1)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels[n]) for n in self.labelnames))
+        return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, n) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+def render_samples(
+    name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]], kind: str = "gauge"
+) -> List[str]:
+    """
+    Exposition lines for values read at scrape time (e.g. cache stats).
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return lines
+
+
+ORDER_STAGE_SECONDS = Histogram(
+    "order_stage_seconds",
+    "Time spent in each extract_order stage.",
+    labelnames=("stage",),
+)
+ORDERS_TOTAL = Counter("orders_total", "Orders extracted.")
+ORDER_MEDICINES_TOTAL = Counter("order_medicines_total", "Medicines returned in extracted orders.")
+LLM_FALLBACK_TOTAL = Counter(
+    "llm_fallback_total",
+    "Orders that needed the LLM fallback, by outcome.",
+    labelnames=("status",),
+)
+
+METRICS = [ORDER_STAGE_SECONDS, ORDERS_TOTAL, ORDER_MEDICINES_TOTAL, LLM_FALLBACK_TOTAL]
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to timings[stage] (seconds).
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def record_order(parsed, total_s: Optional[float] = None) -> None:
+    """
+    Record a finished order: stage histograms, counters, and the timings in
+    meta if ORDER_TIMINGS_IN_META is set.
+    """
+    if total_s is not None:
+        parsed.timings["total"] = total_s
+    for stage, seconds in parsed.timings.items():
+        ORDER_STAGE_SECONDS.observe(seconds, stage=stage)
+    ORDERS_TOTAL.inc()
+    ORDER_MEDICINES_TOTAL.inc(len(parsed.medicines))
+    status = parsed.meta.get("llm_fallback")
+    if status:
+        LLM_FALLBACK_TOTAL.inc(status=status)
+    if TIMINGS_IN_META:
+        parsed.meta["timings_ms"] = {k: round(v * 1000, 3) for k, v in parsed.timings.items()}
+
+
+def render(extra: Iterable[List[str]] = ()) -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for block in extra:
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
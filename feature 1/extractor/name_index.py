@@ -0,0 +1,73 @@
+"""Inverted index used to shortlist catalog names before fuzzy scoring."""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+
+class NameIndex:
+    """
+    Inverted index over a fixed list of names, keyed on first character and
+    bucketed by length.
+
+    `shortlist(phrase, threshold)` returns, in original list order, the names
+    `fuzz.ratio` could score at or above `threshold` under the first-character
+    pre-filter used by `extract_medicines`. Running `process.extractOne` on
+    the shortlist therefore gives the same result as running it on the full
+    candidate list.
+
+    The length filter is lossless because fuzz.ratio (normalized Indel
+    similarity) is at most 2 * min(len_a, len_b) / (len_a + len_b).
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names: List[str] = list(names)
+
+        # first char -> (sorted lengths, ids in the same order)
+        self._by_first: Dict[str, Tuple[List[int], List[int]]] = {}
+        # first char -> (ids, names) in original order
+        self._first_names: Dict[str, Tuple[List[int], List[str]]] = {}
+        self._all: Tuple[List[int], List[int]] = self._bucket(range(len(self.names)))
+
+        groups: Dict[str, List[int]] = {}
+        for idx, name in enumerate(self.names):
+            if name:
+                groups.setdefault(name[0], []).append(idx)
+        for first, ids in groups.items():
+            self._by_first[first] = self._bucket(ids)
+            self._first_names[first] = (ids, [self.names[i] for i in ids])
+
+    def _bucket(self, ids) -> Tuple[List[int], List[int]]:
+        ordered = sorted(ids, key=lambda i: (len(self.names[i]), i))
+        return [len(self.names[i]) for i in ordered], ordered
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def first_char_candidates(self, first: str) -> Tuple[List[int], List[str]]:
+        """
+        (ids, names) of all names starting with `first` in original order,
+        or the whole catalog if none do (the `extract_medicines` pre-filter).
+        """
+        group = self._first_names.get(first)
+        if group is None:
+            return list(range(len(self.names))), self.names
+        return group
+
+    def shortlist(self, phrase: str, threshold: float) -> List[str]:
+        if not phrase:
+            return self.names
+
+        # Same pre-filter as before: names sharing the first character,
+        # or the whole catalog if none do.
+        lengths, ids = self._by_first.get(phrase[0], self._all)
+
+        lp = len(phrase)
+        ratio = threshold / 100.0
+        # Lengths L for which 2 * min(lp, L) / (lp + L) can reach ratio
+        min_len = int(lp * ratio / (2.0 - ratio))
+        max_len = int(lp * (2.0 - ratio) / ratio) + 1
+
+        lo = bisect_left(lengths, min_len)
+        hi = bisect_right(lengths, max_len)
+        keep = sorted(ids[lo:hi])
+        return [self.names[i] for i in keep]
@@ -1,68 +1,71 @@
-import csv
-import os
-from functools import lru_cache
-from typing import Dict, List, TypedDict, Optional
+from typing import Dict, Optional, Sequence
 
 from rapidfuzz import fuzz, process
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-PRODUCTS_CSV = os.path.join(DATA_DIR, "products-export.csv")
+from .catalog import (
+    DATA_DIR,
+    PRODUCTS_CSV,
+    CatalogSnapshot,
+    Product,
+    ProductIndexes,
+    _normalize_name,
+    _normalize_pzn,
+    current_catalog,
+)
+from .log import debug, get_logger, tracing
 
+log = get_logger(__name__)
 
-class Product(TypedDict):
-    product_id: str
-    name: str
-    name_normalized: str
-    pzn: str
-    price_rec: float
-    package_size: str
-    description: str
 
+def load_products() -> Sequence[Product]:
+    """
+    Product rows of the live snapshot; each row dict is built on access.
+    """
+    return current_catalog().products
 
-def _normalize_name(name: str) -> str:
-    return " ".join(name.lower().strip().split())
 
+def product_name_list() -> Sequence[str]:
+    return current_catalog().names
 
-@lru_cache(maxsize=1)
-def load_products() -> List[Product]:
-    products: List[Product] = []
-    with open(PRODUCTS_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            raw_name = row["product name"].strip()
-            try:
-                price = float(str(row["price rec"]).replace(",", "."))
-            except ValueError:
-                price = 0.0
 
-            products.append(
-                {
-                    "product_id": str(row["product id"]).strip(),
-                    "name": raw_name,
-                    "name_normalized": _normalize_name(raw_name),
-                    "pzn": str(row["pzn"]).strip(),
-                    "price_rec": price,
-                    "package_size": str(row["package size"]).strip(),
-                    "description": row.get("descriptions", "").strip(),
-                }
-            )
-    return products
+def product_indexes() -> ProductIndexes:
+    """
+    Hash indexes and the fuzzy corpus of the live catalog snapshot.
+    """
+    return current_catalog().indexes
 
 
-@lru_cache(maxsize=1)
-def product_name_list() -> List[str]:
-    return [p["name"] for p in load_products()]
+def _row(snap: CatalogSnapshot, idx: Optional[int], with_description: bool = False) -> Optional[Product]:
+    if idx is None:
+        return None
+    row = snap.products[idx]
+    if with_description:
+        row["description"] = snap.products.description(idx)
+    return row
 
 
-def find_product_by_name(canonical_name: str) -> Optional[Dict[str, object]]:
+def find_product_by_name(
+    canonical_name: str, snap: Optional[CatalogSnapshot] = None
+) -> Optional[Dict[str, object]]:
     """
-    Exact normalized match; used by the rule-based path.
+    Exact normalized match; used by the rule-based path with the snapshot
+    its medicines were matched against.
     """
-    norm = _normalize_name(canonical_name)
-    for p in load_products():
-        if p["name_normalized"] == norm:
-            return p
-    return None
+    snap = snap or current_catalog()
+    return _row(snap, snap.indexes.by_name.get(_normalize_name(canonical_name)))
+
+
+def find_product_by_pzn(pzn: str, with_description: bool = False) -> Optional[Product]:
+    """
+    Exact PZN lookup, tolerant of missing leading zeros and "PZN-" prefixes.
+    """
+    snap = current_catalog()
+    return _row(snap, snap.indexes.by_pzn.get(_normalize_pzn(pzn)), with_description)
+
+
+def find_product_by_id(product_id: str, with_description: bool = False) -> Optional[Product]:
+    snap = current_catalog()
+    return _row(snap, snap.indexes.by_id.get(str(product_id).strip()), with_description)
 
 
 def find_best_product_for_name(name: str, threshold: int = 50) -> Optional[Product]:
@@ -76,12 +79,13 @@ def find_best_product_for_name(name: str, threshold: int = 50) -> Optional[Produ
     if not name:
         return None
 
-    names = product_name_list()
+    snap = current_catalog()  # one snapshot for the whole lookup
+    names = snap.names
     if not names:
         return None
 
     # We compare lowercased strings but keep the original index
-    lowered = [n.lower() for n in names]
+    lowered = snap.indexes.fuzzy_corpus
 
     match = process.extractOne(
         name.lower(),
@@ -89,13 +93,15 @@ def find_best_product_for_name(name: str, threshold: int = 50) -> Optional[Produ
         scorer=fuzz.token_set_ratio,   # better for subset/superset matches
     )
     if not match:
-        print("BEST MATCH DEBUG: no match for", repr(name))
+        if tracing():
+            debug(log, "best match", query=name, matched=None)
         return None
 
     _, score, idx = match
-    print("BEST MATCH DEBUG:", "query=", repr(name), "score=", score, "matched=", repr(names[idx]))
+    if tracing():
+        debug(log, "best match", query=name, score=score, matched=names[idx])
 
     if score < threshold:
         return None
 
-    return load_products()[idx]
\ No newline at end of file
+    return snap.products[idx]
\ No newline at end of file
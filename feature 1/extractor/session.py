@@ -0,0 +1,219 @@
+"""
+Incremental rule-based parsing for type-ahead order previews.
+
+An OrderSession keeps what it computed for the previous version of the
+text: the spell-corrected words, the fuzzy match of every n-gram and the
+dosage/quantity spans. On each update only the changed region is redone:
+
+- n-grams are matched through a per-session phrase memo, so only n-grams
+  touching edited words are looked up (in medicine.phrase_memo, then scored);
+- spans ending well before the first change are kept and the annotator
+  restarts from a token boundary ANNOTATE_CONTEXT tokens before it.
+
+The result is the same as extract_order_rule_based on the whole text. The
+LLM fallback is never called; the final order is parsed by extract_order
+when the user submits.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from . import ParsedOrder, _rule_medicine
+from .annotate import Span, annotate, details_for_spans, tokenize
+from .catalog import CatalogSnapshot, current_catalog
+from .language import detect_language, translate_to_english
+from .medicine import (
+    PHRASE_MEMO_SIZE,
+    Match,
+    _best_phrase_per_name,
+    _generate_ngrams,
+    _match_phrase,
+    _ngrams_from_corrections,
+    _memo_lookup,
+    phrase_memo,
+    spell_correct,
+)
+from .metrics import timed
+from .preprocess import normalize_text
+from .spelling import correct_token
+
+PREVIEW_MAX_SESSIONS = int(os.getenv("PREVIEW_MAX_SESSIONS", "1000"))
+PREVIEW_SESSION_TTL_S = float(os.getenv("PREVIEW_SESSION_TTL_S", "900"))
+
+# The annotator looks at most 4 tokens ahead ("3 times per day"), so spans
+# that end this many tokens before an edit cannot change.
+ANNOTATE_CONTEXT = 5
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class OrderSession:
+    def __init__(self) -> None:
+        self.catalog: Optional[CatalogSnapshot] = None  # what the memos below were built on
+        self.work_text = ""
+        self.spans: List[Span] = []
+        self._corrected: Dict[str, Optional[str]] = {}
+        self._matches: Dict[str, Match] = {}
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reset(self, catalog: CatalogSnapshot) -> None:
+        self.catalog = catalog
+        self.work_text = ""
+        self.spans = []
+        self._corrected = {}
+        self._matches = {}
+
+    def _ngrams(self, words: List[str], snap: CatalogSnapshot) -> Dict[str, str]:
+        """
+        medicine._corrected_ngrams (or the plain n-grams) with per-word
+        corrections memoized across updates.
+        """
+        if not spell_correct(snap):
+            return {p: p for p in _generate_ngrams(words, max_n=3)}
+        index = snap.token_index
+        corrected: List[Optional[str]] = []
+        memo: Dict[str, Optional[str]] = {}
+        for w in words:
+            if w not in memo:
+                memo[w] = self._corrected[w] if w in self._corrected else correct_token(w, index)
+            corrected.append(memo[w])
+        self._corrected = memo
+        return _ngrams_from_corrections(words, corrected, max_n=3)
+
+    def _medicines(self, work_text: str, snap: CatalogSnapshot) -> List[Tuple[str, str]]:
+        """
+        extract_medicines(work_text), scoring only phrases not seen in the
+        previous version of the text.
+        """
+        words = normalize_text(work_text).split()
+        originals = self._ngrams(words, snap)
+        index = snap.name_index
+
+        new = [phrase for phrase in originals if phrase not in self._matches]
+        if PHRASE_MEMO_SIZE > 0:
+            scored = _memo_lookup(new, "index", phrase_memo, snap)
+        else:
+            scored = {phrase: _match_phrase(phrase, index) for phrase in new}
+
+        matches: Dict[str, Match] = {}
+        found_raw: List[Tuple[str, str, float]] = []
+        for phrase in originals:
+            match = self._matches[phrase] if phrase in self._matches else scored[phrase]
+            matches[phrase] = match
+            if match:
+                found_raw.append((match[0], phrase, match[1]))
+        self._matches = matches
+        return [(canonical, originals[phrase]) for canonical, phrase in _best_phrase_per_name(found_raw)]
+
+    def _annotate(self, work_text: str) -> List[Span]:
+        """
+        annotate(work_text), reusing the spans before the first change.
+        """
+        changed = _common_prefix(self.work_text, work_text)
+        if changed == len(self.work_text) == len(work_text):
+            return self.spans
+        tokens = tokenize(self.work_text)
+        # Last old token that starts at or before the change
+        k = 0
+        while k < len(tokens) and tokens[k].start <= changed:
+            k += 1
+        k = max(0, k - 1 - ANNOTATE_CONTEXT)
+        # Move back to a token the scanner stopped at: not inside a span and
+        # not the number of a skipped "for N ..."
+        while k > 0:
+            cut = tokens[k].start
+            inside = any(s.start < cut < s.end for s in self.spans)
+            if not inside and tokens[k - 1].text not in ("for", "x"):
+                break
+            k -= 1
+        cut = tokens[k].start if k > 0 else 0
+        if cut == 0:
+            return annotate(work_text)
+        kept = [s for s in self.spans if s.end <= cut]
+        rest = annotate(work_text[cut:])
+        return kept + [s._replace(start=s.start + cut, end=s.end + cut) for s in rest]
+
+    def update(self, text: str) -> ParsedOrder:
+        """
+        Rule-based parse of the current text. Never calls the LLM.
+        """
+        with self._lock:
+            self.last_used = time.monotonic()
+            catalog = current_catalog()
+            if catalog is not self.catalog:
+                self._reset(catalog)
+
+            original_text = text or ""
+            timings: Dict[str, float] = {}
+            with timed(timings, "preprocess"):
+                normalized = normalize_text(original_text)
+            with timed(timings, "language"):
+                lang = detect_language(original_text)
+                translated = translate_to_english(original_text, lang, catalog)
+            with timed(timings, "preprocess"):
+                work_text = normalize_text(translated)
+
+            with timed(timings, "medicines"):
+                meds = self._medicines(work_text, catalog)
+            with timed(timings, "dosage_quantity"):
+                spans = self._annotate(work_text)
+                details = details_for_spans(work_text, spans, [phrase for _, phrase in meds])
+            self.work_text, self.spans = work_text, spans
+
+            medicines = [
+                _rule_medicine(canonical, phrase, dosage_info, qty, timings, catalog)
+                for (canonical, phrase), (dosage_info, qty) in zip(meds, details)
+            ]
+            return ParsedOrder(
+                original_text=original_text,
+                normalized_text=normalized,
+                language=lang,
+                translated_text=translated,
+                medicines=medicines,
+                meta={"catalog_version": catalog.version, "preview": True},
+                timings=timings,
+            )
+
+
+class SessionStore:
+    """
+    Preview sessions by id: LRU-bounded, expired after PREVIEW_SESSION_TTL_S
+    without updates.
+    """
+
+    def __init__(self, max_sessions: int = PREVIEW_MAX_SESSIONS, ttl_s: float = PREVIEW_SESSION_TTL_S):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions: "OrderedDict[str, OrderSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> OrderSession:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None or now - session.last_used > self.ttl_s:
+                session = OrderSession()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+preview_sessions = SessionStore()
@@ -0,0 +1,38 @@
+"""Token-level typo correction against the words of catalog product names."""
+
+from typing import List, Optional, Sequence
+
+from .symspell import DeleteIndex
+
+TYPO_THRESHOLD = 80   # fuzz.ratio a corrected token must reach ("norsn" -> "norsan" is 91)
+TYPO_MIN_LEN = 4      # shorter tokens ("mg", "d3", "500") are only matched exactly
+TYPO_MAX_DELETES = 2  # bounds the index to ~n_tokens * len^2 / 2 entries
+
+
+def build_token_index(names: Sequence[str]) -> DeleteIndex:
+    """
+    DeleteIndex over the distinct words of `names` (normalized product
+    names), in order of first appearance.
+    """
+    tokens = dict.fromkeys(w for name in names for w in name.split())
+    return DeleteIndex(tokens, threshold=TYPO_THRESHOLD, max_deletes=TYPO_MAX_DELETES)
+
+
+def correct_token(token: str, index: DeleteIndex) -> Optional[str]:
+    """
+    The catalog token `token` most likely stands for, or None if it is not
+    close to any of them.
+    """
+    if index.contains(token):
+        return token
+    if len(token) < TYPO_MIN_LEN or not token.isalpha():
+        return None
+    match = index.best(token)
+    return match[0] if match else None
+
+
+def correct_words(words: Sequence[str], index: DeleteIndex) -> List[Optional[str]]:
+    """
+    correct_token for each word; None marks words unrelated to the catalog.
+    """
+    return [correct_token(w, index) for w in words]
@@ -0,0 +1,128 @@
+"""Symmetric-delete (SymSpell-style) lookup for typo-tolerant word matching."""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from rapidfuzz import fuzz
+
+
+def max_deletes_for(length: int, threshold: float) -> int:
+    """
+    Most characters that can be deleted from a word of `length` on the way
+    to a common subsequence with another word it scores `threshold` against.
+
+    With f = 1 - threshold / 100, fuzz.ratio >= threshold means
+    da + db <= f * (la + lb). Since lb = la - da + db this gives
+    da <= 2 * f * la / (1 + f), independent of the other word.
+    """
+    f = (100 - threshold) / 100
+    return int(2 * f * length / (1 + f) + 1e-9)
+
+
+def length_window(length: int, threshold: float) -> Tuple[int, int]:
+    """
+    Lengths another word can have and still score `threshold` against a
+    word of `length`, since fuzz.ratio <= 200 * min / (la + lb).
+    """
+    return (
+        int(length * threshold / (200 - threshold) - 1e-9) + 1 if threshold > 0 else 0,
+        int(length * (200 - threshold) / threshold + 1e-9) if threshold > 0 else 10**9,
+    )
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1 :])
+        nxt -= out
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+class DeleteIndex:
+    """
+    Maps every string reachable from a vocabulary word by up to k deletions
+    back to that word. A query generates its own deletions and intersects,
+    so candidates within Indel distance k are found with hash lookups
+    instead of scoring the whole vocabulary.
+
+    With the default k (derived from `threshold`) `best()` returns exactly
+    what `process.extractOne(token, words, scorer=fuzz.ratio)` would with
+    that cutoff: the highest-scoring word, earliest on ties. `max_deletes`
+    caps k for large vocabularies, trading recall on long words for memory.
+    """
+
+    def __init__(self, words: Iterable[str], threshold: float = 85, max_deletes: Optional[int] = None):
+        self.threshold = threshold
+        self.max_deletes = max_deletes
+        self.words: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._deletes: Dict[str, List[int]] = {}
+
+        for word in words:
+            if not word or word in self._ids:
+                continue
+            wid = self._ids[word] = len(self.words)
+            self.words.append(word)
+            for d in _deletes(word, self._depth(len(word))):
+                self._deletes.setdefault(d, []).append(wid)
+
+        self._lengths = {len(w) for w in self.words}
+
+    def _depth(self, length: int) -> int:
+        k = max_deletes_for(length, self.threshold)
+        return k if self.max_deletes is None else min(k, self.max_deletes)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def contains(self, word: str) -> bool:
+        return word in self._ids
+
+    def candidates(self, token: str) -> List[int]:
+        """
+        Ids of vocabulary words sharing a deletion variant with `token`, in
+        vocabulary order.
+        """
+        wid = self._ids.get(token)
+        lo, hi = length_window(len(token), self.threshold)
+        if not any(lo <= n <= hi for n in self._lengths):
+            return []
+        found: Set[int] = set() if wid is None else {wid}
+        for d in _deletes(token, self._depth(len(token))):
+            ids = self._deletes.get(d)
+            if ids:
+                found.update(ids)
+        return sorted(found)
+
+    def best(self, token: str) -> Optional[Tuple[str, float]]:
+        """
+        (word, score) of the best vocabulary word at or above the threshold.
+        """
+        if token in self._ids:
+            # An exact hit scores 100; nothing else can beat it
+            return token, 100.0
+        best: Optional[Tuple[str, float]] = None
+        for wid in self.candidates(token):
+            word = self.words[wid]
+            score = fuzz.ratio(token, word, score_cutoff=self.threshold)
+            if score and (best is None or score > best[1]):
+                best = (word, score)
+        return best
+
+    def matches(self, token: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """
+        Up to `limit` (word, score) pairs at or above the threshold, best first.
+        """
+        scored = []
+        for wid in self.candidates(token):
+            word = self.words[wid]
+            score = fuzz.ratio(token, word, score_cutoff=self.threshold)
+            if score:
+                scored.append((word, score))
+        scored.sort(key=lambda ws: -ws[1])
+        return scored[:limit]
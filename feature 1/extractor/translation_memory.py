@@ -0,0 +1,204 @@
+"""
+Translation memory for German and romanized Hindi pharmacy phrasing.
+
+A curated term/phrase table (number words, frequencies, time of day,
+durations, quantity units and forms) is compiled per language into a
+word-level trie. translate() walks the text once, replacing the longest
+phrase that starts at each word with its English equivalent, so the
+English rules (annotate, dosage, quantity) apply. "#" in a phrase matches
+a number (digits or a number word of the same language) and is filled
+into "{0}" of the replacement. Everything else, product names included,
+is copied as typed.
+
+Keys are folded (lowercase, no diacritics, ß -> ss), so "täglich",
+"Taglich" and "TÄGLICH" are the same entry.
+"""
+
+import re
+import unicodedata
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DE_NUMBERS = {
+    "ein": "1", "eine": "1", "einen": "1", "zwei": "2", "drei": "3", "vier": "4", "fünf": "5", "fuenf": "5",
+    "sechs": "6", "sieben": "7", "acht": "8", "neun": "9", "zehn": "10", "zwölf": "12", "zwoelf": "12",
+}
+HI_NUMBERS = {
+    "ek": "1", "do": "2", "teen": "3", "char": "4", "chaar": "4", "paanch": "5", "panch": "5",
+    "chhe": "6", "che": "6", "saat": "7", "aath": "8", "nau": "9", "das": "10",
+}
+
+DE_TERMS = {
+    # frequency
+    "einmal": "once", "zweimal": "twice", "dreimal": "3 times", "viermal": "4 times", "# mal": "{0} times",
+    "am tag": "a day", "pro tag": "per day", "täglich": "daily", "taeglich": "daily",
+    "einmal am tag": "once a day", "zweimal am tag": "twice a day", "dreimal am tag": "3 times a day",
+    "einmal täglich": "once daily", "zweimal täglich": "twice daily", "dreimal täglich": "3 times daily",
+    "# mal am tag": "{0} times a day", "# mal täglich": "{0} times daily",
+    "alle # stunden": "every {0} hours", "bei bedarf": "as needed",
+    # time of day
+    "morgens": "in the morning", "am morgen": "in the morning", "abends": "at night", "nachts": "at night",
+    "zur nacht": "at night", "vor dem schlafengehen": "before bed", "vor dem schlafen": "before bed",
+    "nach dem abendessen": "after dinner", "vor dem frühstück": "before breakfast",
+    # duration
+    "für": "for", "fuer": "for", "# tage lang": "for {0} days", "# wochen lang": "for {0} weeks",
+    "tag": "day", "tage": "days", "tagen": "days", "woche": "week", "wochen": "weeks",
+    "monat": "month", "monate": "months", "monaten": "months",
+    # quantity units
+    "packung": "pack", "packungen": "packs", "schachtel": "box", "schachteln": "boxes",
+    "streifen": "strips", "blister": "strips",
+    # forms
+    "tablette": "tablet", "tabletten": "tablets", "filmtabletten": "tablets",
+    "kapsel": "capsule", "kapseln": "capsules", "tropfen": "drops", "sirup": "syrup", "saft": "syrup",
+    "spritze": "injection", "spritzen": "injections",
+}
+HI_TERMS = {
+    # "do" is also "give": keep the verb phrases from becoming a number
+    "bhej do": "send", "de do": "give", "kar do": "do", "daal do": "add", "dal do": "add", "dila do": "get",
+    # frequency
+    "ek baar": "once", "do baar": "twice", "# baar": "{0} times",
+    "din mein ek baar": "once a day", "din mein do baar": "twice a day", "din mein # baar": "{0} times a day",
+    "din me ek baar": "once a day", "din me do baar": "twice a day", "din me # baar": "{0} times a day",
+    "ek baar din mein": "once a day", "do baar din mein": "twice a day", "# baar din mein": "{0} times a day",
+    "roz ek baar": "once a day", "roz do baar": "twice a day", "roz # baar": "{0} times a day",
+    "roz": "daily", "rozana": "daily", "har roz": "daily", "har # ghante": "every {0} hours",
+    "zarurat par": "as needed", "zaroorat par": "as needed", "zarurat padne par": "as needed",
+    # time of day
+    "subah": "in the morning", "raat ko": "at night", "sone se pehle": "before bed",
+    "nashte se pehle": "before breakfast", "khane ke baad": "after dinner",
+    # duration
+    "# din tak": "for {0} days", "# din ke liye": "for {0} days",
+    "# hafte tak": "for {0} weeks", "# hafta tak": "for {0} weeks", "# mahine tak": "for {0} months",
+    # quantity units
+    "dabba": "box", "dabbe": "boxes", "dabbi": "box", "dibba": "box", "patta": "strip", "patte": "strips",
+    # forms
+    "goli": "tablet", "goliyan": "tablets", "goliya": "tablets", "boond": "drops", "boonde": "drops",
+    "sharbat": "syrup", "tika": "injection",
+}
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+(?:[.,]\d+)?")
+SLOT = "#"
+
+
+def fold(word: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", word.lower().replace("ß", "ss"))
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class _Node:
+    __slots__ = ("children", "replacement")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.replacement: Optional[str] = None
+
+
+class _Match(NamedTuple):
+    length: int         # tokens consumed
+    literals: int       # non-slot tokens; more wins on equal length
+    replacement: str
+    slots: Tuple[str, ...]
+
+
+class PhraseTrie:
+    """
+    Word-level trie over folded phrases, with "#" number slots.
+    """
+
+    def __init__(self, terms: Dict[str, str], numbers: Dict[str, str]):
+        self.root = _Node()
+        self.numbers = {fold(w): n for w, n in numbers.items()}
+        self.max_len = 1
+        for phrase, replacement in terms.items():
+            self.add(phrase, replacement)
+        for word, number in numbers.items():
+            self.add(word, number)
+
+    def add(self, phrase: str, replacement: str) -> None:
+        node = self.root
+        words = [SLOT if w == SLOT else fold(w) for w in phrase.split()]
+        for w in words:
+            node = node.children.setdefault(w, _Node())
+        node.replacement = replacement
+        self.max_len = max(self.max_len, len(words))
+
+    def _number(self, token: str) -> Optional[str]:
+        if token[0].isdigit():
+            return token
+        return self.numbers.get(token)
+
+    def longest(self, tokens: Sequence[str], start: int, limit: int) -> Optional[_Match]:
+        """
+        Longest phrase starting at tokens[start] and ending before `limit`.
+        """
+        best: Optional[_Match] = None
+        stack: List[Tuple[_Node, int, int, Tuple[str, ...]]] = [(self.root, start, 0, ())]
+        while stack:
+            node, i, literals, slots = stack.pop()
+            if node.replacement is not None and i > start:
+                cand = _Match(i - start, literals, node.replacement, slots)
+                if best is None or (cand.length, cand.literals) > (best.length, best.literals):
+                    best = cand
+            if i >= limit:
+                continue
+            child = node.children.get(tokens[i])
+            if child is not None:
+                stack.append((child, i + 1, literals + 1, slots))
+            slot = node.children.get(SLOT)
+            if slot is not None:
+                value = self._number(tokens[i])
+                if value is not None:
+                    stack.append((slot, i + 1, literals, slots + (value,)))
+        return best
+
+
+def _compile(terms: Dict[str, str], numbers: Dict[str, str], multi_word_only: bool = False) -> PhraseTrie:
+    if multi_word_only:
+        terms = {p: r for p, r in terms.items() if len(p.split()) > 1}
+        numbers = {}
+    return PhraseTrie(terms, numbers)
+
+
+TRIES: Dict[str, PhraseTrie] = {
+    "de": _compile(DE_TERMS, DE_NUMBERS),
+    "hi": _compile(HI_TERMS, HI_NUMBERS),
+}
+# Text detected as English may still carry a German or Hindi phrase
+# ("... einmal am tag"); only multi-word entries are safe to apply there.
+MIXED_TRIE = _compile({**DE_TERMS, **HI_TERMS}, {}, multi_word_only=True)
+
+
+def translate(text: str, lang: str, protected: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Rewrite the known German/Hindi phrases of `text` in English, in one
+    pass. Single words for which `protected(folded_word)` is true (e.g.
+    words of catalog product names) are left alone.
+    """
+    trie = TRIES.get(lang, MIXED_TRIE)
+    matches = list(TOKEN_PATTERN.finditer(text))
+    if not matches:
+        return text
+    tokens = [fold(m.group(0)) for m in matches]
+
+    out: List[str] = []
+    pos = 0  # next character of `text` to copy
+    i = 0
+    n = len(tokens)
+    while i < n:
+        # A phrase may only span words separated by whitespace
+        limit = i + 1
+        while (
+            limit < n
+            and limit - i < trie.max_len
+            and text[matches[limit - 1].end() : matches[limit].start()].isspace()
+        ):
+            limit += 1
+        match = trie.longest(tokens, i, limit)
+        if match is None or (match.length == 1 and protected is not None and protected(tokens[i])):
+            i += 1
+            continue
+        out.append(text[pos : matches[i].start()])
+        out.append(match.replacement.format(*match.slots))
+        pos = matches[i + match.length - 1].end()
+        i += match.length
+    out.append(text[pos:])
+    return "".join(out)
@@ -1,11 +1,44 @@
-import React, { useState } from "react";
+import React, { useRef, useState } from "react";
 
 const API_BASE = "http://localhost:8000";
+const PREVIEW_DEBOUNCE_MS = 150;
 
 export default function Chat() {
   const [input, setInput] = useState("");
   const [response, setResponse] = useState(null);
+  const [preview, setPreview] = useState([]);
   const [loading, setLoading] = useState(false);
+  const sessionId = useRef(Math.random().toString(36).slice(2));
+  const previewTimer = useRef(null);
+  const previewRequest = useRef(null);
+
+  function updatePreview(text) {
+    setInput(text);
+    // Wait for a pause in typing, then send only the latest text
+    clearTimeout(previewTimer.current);
+    previewTimer.current = setTimeout(() => fetchPreview(text), PREVIEW_DEBOUNCE_MS);
+  }
+
+  async function fetchPreview(text) {
+    // A newer edit supersedes the request still in flight
+    if (previewRequest.current) previewRequest.current.abort();
+    const controller = new AbortController();
+    previewRequest.current = controller;
+    try {
+      const res = await fetch(`${API_BASE}/chat/preview`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ session_id: sessionId.current, message: text }),
+        signal: controller.signal,
+      });
+      const data = await res.json();
+      if (previewRequest.current === controller) {
+        setPreview(data.medicines || []);
+      }
+    } catch (err) {
+      if (err.name !== "AbortError") console.error(err);
+    }
+  }
 
   async function sendMessage(e) {
     e.preventDefault();
@@ -34,7 +67,7 @@ export default function Chat() {
       <form onSubmit={sendMessage}>
         <input
           value={input}
-          onChange={(e) => setInput(e.target.value)}
+          onChange={(e) => updatePreview(e.target.value)}
           placeholder="e.g. I need 2 strips of paracetamol 500mg"
           style={{ width: "400px" }}
         />
@@ -43,6 +76,18 @@ export default function Chat() {
         </button>
       </form>
 
+      {preview.length > 0 && (
+        <ul>
+          {preview.map((m) => (
+            <li key={m.name}>
+              {m.quantity ? `${m.quantity} x ` : ""}
+              {m.name}
+              {m.dosage ? ` (${m.dosage})` : ""}
+            </li>
+          ))}
+        </ul>
+      )}
+
       {response && (
         <pre style={{ marginTop: "1rem", background: "#f5f5f5", padding: "1rem" }}>
           {JSON.stringify(response, null, 2)}
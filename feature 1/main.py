@@ -1,11 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from api.admin import router as admin_router
 from api.chat import router as chat_router
+from api.metrics import router as metrics_router
+from api.products import router as products_router
 from api.voice import router as voice_router
+from extractor.batch import shutdown_pool
+from extractor.catalog import CatalogWatcher, current_catalog
+from extractor.llm_parser import aclose_async_client
+from extractor.log import TRACE_HEADER, configure_logging, reset_trace, shutdown_logging, trace_request
+from voice.pool import stt_pool
+from voice.tts import start_prerender
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    # Load the catalog before serving so no request pays for it
+    await asyncio.to_thread(current_catalog)
+    watcher = CatalogWatcher()
+    watcher.start()
+    start_prerender()
+    yield
+    watcher.stop()
+    shutdown_pool()
+    stt_pool.shutdown()
+    await aclose_async_client()
+    shutdown_logging()
+
+
+app = FastAPI(title="Pharmacy Agent - Feature 1", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def debug_trace(request: Request, call_next):
+    # "X-Debug-Trace: 1" logs every debug trace of this request, unsampled
+    token = trace_request(request.headers.get(TRACE_HEADER, "") in ("1", "true", "yes"))
+    try:
+        return await call_next(request)
+    finally:
+        reset_trace(token)
 
-app = FastAPI(title="Pharmacy Agent - Feature 1")
 
 app.include_router(chat_router)
 app.include_router(voice_router)
+app.include_router(products_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
 
 # health check
 @app.get("/health")
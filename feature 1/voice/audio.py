@@ -0,0 +1,51 @@
+"""
+Audio decoding for PCM speech backends: WAV in, mono float32 at the
+model's sample rate out. Runs in the STT worker processes, never on the
+event loop.
+"""
+
+import io
+import wave
+from typing import Tuple
+
+import numpy as np
+
+_SAMPLE_TYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    (mono samples in [-1, 1], sample rate). Raises ValueError for anything
+    that is not uncompressed PCM WAV.
+    """
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as exc:
+        raise ValueError(f"unsupported audio: {exc}") from exc
+    if width not in _SAMPLE_TYPES:
+        raise ValueError(f"unsupported sample width: {width} bytes")
+
+    samples = np.frombuffer(frames, dtype=_SAMPLE_TYPES[width]).astype(np.float32)
+    if width == 1:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(2 ** (8 * width - 1))
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """
+    Linear-interpolation resampling; good enough for speech models that
+    expect 16 kHz input.
+    """
+    if rate == target_rate or not len(samples):
+        return samples
+    n_out = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(n_out, dtype=np.float64) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
@@ -0,0 +1,78 @@
+"""
+Pluggable speech-to-text backends for the STT worker pool.
+
+STT_BACKEND names a registered backend ("mock") or a "module:Class" path.
+A backend is instantiated and `load()`ed once per worker process, so
+model weights are read once and reused for every job.
+"""
+
+import importlib
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+from .audio import decode_wav, resample
+from .stt import speech_to_text
+
+
+class STTBackend:
+    name = "base"
+
+    def load(self) -> None:
+        """
+        Load the model. Called once in each worker before its first job.
+        """
+
+    def transcribe(self, audio: bytes) -> Optional[str]:
+        raise NotImplementedError
+
+
+class PCMBackend(STTBackend):
+    """
+    Base for real models: decodes the upload (WAV) and resamples it to
+    `sample_rate` before calling transcribe_pcm.
+    """
+
+    sample_rate = 16000
+
+    def transcribe(self, audio: bytes) -> Optional[str]:
+        try:
+            samples, rate = decode_wav(audio)
+        except ValueError:
+            return None
+        return self.transcribe_pcm(resample(samples, rate, self.sample_rate))
+
+    def transcribe_pcm(self, samples: np.ndarray) -> Optional[str]:
+        raise NotImplementedError
+
+
+class MockBackend(STTBackend):
+    """
+    The UTF-8 text stand-in (voice.stt.speech_to_text); needs no model.
+    """
+
+    name = "mock"
+
+    def transcribe(self, audio: bytes) -> Optional[str]:
+        return speech_to_text(audio)
+
+
+BACKENDS: Dict[str, Type[STTBackend]] = {"mock": MockBackend}
+
+
+def load_backend(spec: str, registry: Optional[Dict[str, type]] = None):
+    """
+    Instantiate and load a backend from `registry` (default: the STT
+    backends) or a "module:Class" path.
+    """
+    registry = BACKENDS if registry is None else registry
+    if spec in registry:
+        cls = registry[spec]
+    else:
+        module_name, _, attr = spec.partition(":")
+        if not attr:
+            raise ValueError(f"unknown backend {spec!r}; use one of {sorted(registry)} or 'module:Class'")
+        cls = getattr(importlib.import_module(module_name), attr)
+    backend = cls()
+    backend.load()
+    return backend
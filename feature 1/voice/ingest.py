@@ -0,0 +1,134 @@
+"""
+Bounded, chunked ingestion of voice uploads.
+
+Audio flows from the request in chunks through a size guard to the STT
+consumer, so no upload holds more than VOICE_MAX_BYTES. Oversized uploads
+are rejected from Content-Length before any body is read, or as soon as
+the running total passes the limit.
+
+The STT backends transcribe whole clips, so the HTTP routes gather the
+upload and only then start transcribing. Only the websocket stream
+transcribes while audio arrives; there a small bounded buffer keeps
+receiving frames while the consumer works on the previous ones.
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers, UploadFile as FormFile
+from starlette.formparsers import MultiPartParser
+
+VOICE_MAX_BYTES = int(os.getenv("VOICE_MAX_BYTES", str(10 * 1024 * 1024)))
+VOICE_CHUNK_BYTES = 64 * 1024
+VOICE_BUFFER_CHUNKS = 16  # chunks held between the websocket reader and STT
+MULTIPART_OVERHEAD = 16 * 1024  # boundaries and part headers around the file
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+def check_declared_size(content_length: Optional[str], max_bytes: int = VOICE_MAX_BYTES) -> None:
+    """
+    Reject early when the client announces more than we accept.
+    """
+    try:
+        declared = int(content_length) if content_length else None
+    except ValueError:
+        return
+    if declared is not None and declared > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+
+async def bounded(source: AsyncIterator[bytes], max_bytes: int = VOICE_MAX_BYTES) -> AsyncIterator[bytes]:
+    """
+    Pass chunks through, raising UploadTooLarge once more than `max_bytes`
+    have been seen.
+    """
+    total = 0
+    async for chunk in source:
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        if chunk:
+            yield chunk
+
+
+async def multipart_file(
+    headers: Headers, body: AsyncIterator[bytes], field: str = "file", max_bytes: int = VOICE_MAX_BYTES
+) -> UploadFile:
+    """
+    Parse a multipart body as it arrives and return its `field` file part.
+
+    FastAPI's File() parameter spools the whole body before the handler
+    runs; here the body passes through bounded(), so an oversized upload
+    fails with UploadTooLarge as soon as it passes max_bytes plus
+    MULTIPART_OVERHEAD. Raises ValueError if the part is missing.
+    """
+    parser = MultiPartParser(headers, bounded(body, max_bytes + MULTIPART_OVERHEAD), max_files=1, max_fields=16)
+    form = await parser.parse()
+    part = form.get(field)
+    if not isinstance(part, FormFile):
+        await form.close()
+        raise ValueError(f'multipart field "{field}" with a file is required')
+    if part.size is not None and part.size > max_bytes:
+        await form.close()
+        raise UploadTooLarge(max_bytes)
+    return part
+
+
+async def upload_chunks(file: UploadFile, chunk_size: int = VOICE_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+_DONE = object()
+
+
+async def buffered(source: AsyncIterator[bytes], capacity: int = VOICE_BUFFER_CHUNKS) -> AsyncIterator[bytes]:
+    """
+    Read `source` on a separate task into a queue of at most `capacity`
+    chunks, so receiving audio overlaps with incremental transcription
+    while memory stays bounded. Errors from the reader are re-raised to the
+    consumer.
+    """
+    q: asyncio.Queue = asyncio.Queue(maxsize=capacity)
+
+    async def reader() -> None:
+        try:
+            async for chunk in source:
+                await q.put(chunk)
+            await q.put(_DONE)
+        except Exception as exc:
+            await q.put(exc)
+
+    task = asyncio.create_task(reader())
+    try:
+        while True:
+            item = await q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # The consumer may stop early (e.g. undecodable audio)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def audio_stream(source: AsyncIterator[bytes], max_bytes: int = VOICE_MAX_BYTES) -> AsyncIterator[bytes]:
+    """
+    The iterator handed to streaming STT: size-guarded and buffered.
+    """
+    return buffered(bounded(source, max_bytes))
@@ -0,0 +1,218 @@
+"""
+STT execution: backend models run in a process pool, never on the event loop.
+
+Jobs in flight (receiving audio, queued or running) are bounded by
+STT_QUEUE_SIZE; beyond that callers get STTUnavailable straight away,
+which the API turns into 503 + Retry-After. Each job has STT_TIMEOUT_S.
+A timed-out job cannot be cancelled once it runs, so the pool is recycled:
+its worker processes are killed, every slot they held is released and the
+next job starts a fresh pool. Other jobs on the killed pool fail with
+STTUnavailable. STT_WORKERS=0 runs jobs on a thread in this process
+(development and tests with the mock backend); a thread cannot be killed,
+so there a timed-out job keeps its slot until it finishes.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, Optional, Set, Union
+
+from .backends import STTBackend, load_backend
+
+STT_BACKEND = os.getenv("STT_BACKEND", "mock")
+STT_WORKERS = int(os.getenv("STT_WORKERS", "1"))
+STT_QUEUE_SIZE = int(os.getenv("STT_QUEUE_SIZE", "0")) or max(1, STT_WORKERS) * 4
+STT_TIMEOUT_S = float(os.getenv("STT_TIMEOUT_S", "30"))
+STT_RETRY_AFTER_S = int(os.getenv("STT_RETRY_AFTER_S", "2"))
+
+_backend: Optional[STTBackend] = None
+
+
+class STTUnavailable(Exception):
+    def __init__(self, reason: str, retry_after: int = STT_RETRY_AFTER_S):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class STTTimeout(Exception):
+    pass
+
+
+def _init_worker(spec: str) -> None:
+    global _backend
+    _backend = load_backend(spec)
+
+
+def _transcribe_job(audio: bytes) -> Optional[str]:
+    return _backend.transcribe(audio)
+
+
+class STTPool:
+    def __init__(
+        self,
+        backend: str = STT_BACKEND,
+        workers: int = STT_WORKERS,
+        queue_size: int = STT_QUEUE_SIZE,
+        timeout_s: float = STT_TIMEOUT_S,
+    ):
+        self.backend = backend
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_s = timeout_s
+        self.in_flight = 0
+        self.finished = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._executor: Optional[Union[ProcessPoolExecutor, ThreadPoolExecutor]] = None
+        self._running: Set[Future] = set()  # submitted jobs still holding a slot
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Union[ProcessPoolExecutor, ThreadPoolExecutor]:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_init_worker, initargs=(self.backend,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, initializer=_init_worker, initargs=(self.backend,)
+                    )
+            return self._executor
+
+    def check_capacity(self) -> None:
+        """
+        Raise STTUnavailable if a new job would be rejected; lets callers
+        refuse an upload before reading it.
+        """
+        if self.in_flight >= self.queue_size:
+            self.rejected += 1
+            raise STTUnavailable("speech recognition is busy")
+
+    def reserve(self) -> None:
+        """
+        Take a job slot (STTUnavailable if none is free). For callers that
+        must receive an upload before it can be transcribed: reserve first,
+        then hand the slot to transcribe_chunks(reserved=True), or give it
+        back with unreserve() if the upload fails.
+        """
+        with self._lock:
+            self.check_capacity()
+            self.in_flight += 1
+
+    def unreserve(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            if future in self._running:  # not already freed by _recycle
+                self._running.discard(future)
+                self.in_flight -= 1
+                self.finished += 1
+
+    def _discard(self, executor: Union[ProcessPoolExecutor, ThreadPoolExecutor]) -> None:
+        """
+        Shut down `executor` if it is still the current one; the next job
+        starts a fresh pool.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _recycle(self, executor: Union[ProcessPoolExecutor, ThreadPoolExecutor]) -> None:
+        """
+        Kill the worker processes of `executor` (a job on it timed out) and
+        release every slot its jobs held.
+        """
+        if not isinstance(executor, ProcessPoolExecutor):
+            return
+        with self._lock:
+            if self._executor is not executor:
+                return  # already recycled by another timeout
+            self._executor = None
+            self.in_flight -= len(self._running)
+            self._running = set()
+            self.recycled += 1
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, audio: bytes) -> Optional[str]:
+        """
+        Run one job in a slot the caller has already reserved.
+        """
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_transcribe_job, audio)
+        except (BrokenProcessPool, RuntimeError) as exc:
+            self.unreserve()
+            self.shutdown(wait=False)  # start fresh on the next job
+            raise STTUnavailable(f"speech recognition restarting: {exc}") from exc
+        with self._lock:
+            self._running.add(future)
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._recycle(executor)
+            raise STTTimeout(f"transcription took longer than {self.timeout_s}s")
+        except BrokenProcessPool as exc:
+            self._discard(executor)
+            raise STTUnavailable(f"speech recognition worker crashed: {exc}") from exc
+
+    async def transcribe(self, audio: bytes) -> Optional[str]:
+        """
+        Transcribe a whole clip on a worker. Raises STTUnavailable (queue
+        full, pool broken) or STTTimeout.
+        """
+        self.reserve()
+        return await self._run(audio)
+
+    async def transcribe_chunks(self, chunks: AsyncIterator[bytes], reserved: bool = False) -> Optional[str]:
+        """
+        transcribe() for audio that is still arriving: the chunks (already
+        size-bounded, see voice.ingest) are gathered while the upload is
+        received, then sent to a worker in one piece. The slot is taken
+        before the first chunk is read (or earlier by the caller, with
+        `reserved`), so concurrent uploads cannot all pass the capacity
+        check and then pile up at submit.
+        """
+        if not reserved:
+            self.reserve()
+        try:
+            audio = bytearray()
+            async for chunk in chunks:
+                audio += chunk
+        except BaseException:
+            self.unreserve()
+            raise
+        return await self._run(bytes(audio))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "finished": self.finished,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+        }
+
+
+stt_pool = STTPool()
@@ -0,0 +1,26 @@
+"""
+Synthesize every catalog product name and the confirmation templates into
+the TTS cache, so order read-backs are served without synthesis latency:
+
+    python -m voice.prerender --voice default
+"""
+
+import argparse
+import time
+
+from .tts import TTS_VOICE, prerender_catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-render catalog product names into the TTS cache.")
+    parser.add_argument("--voice", action="append", help="repeat for several voices")
+    args = parser.parse_args()
+
+    for voice in args.voice or [TTS_VOICE]:
+        t0 = time.perf_counter()
+        done = prerender_catalog(voice)
+        print(f"voice {voice}: {done} segments synthesized in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
-from typing import Optional
+import codecs
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+
+@dataclass
+class Transcript:
+    text: str      # everything heard so far
+    stable: str    # prefix that will not change any more
+    final: bool = False
+
 
 def speech_to_text(audio_bytes: bytes) -> Optional[str]:
     """
@@ -14,4 +24,23 @@ def speech_to_text(audio_bytes: bytes) -> Optional[str]:
         text = audio_bytes.decode("utf-8").strip()
         return text or None
     except UnicodeDecodeError:
-        return None
\ No newline at end of file
+        return None
+
+
+async def transcribe_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[Transcript]:
+    """
+    Partial transcripts while audio arrives, one per chunk, then a final one.
+
+    The mock decodes UTF-8 incrementally (multi-byte characters may be split
+    across chunks); the last word may still be growing, so only the text up
+    to the last whitespace counts as stable.
+    Raises UnicodeDecodeError for audio it cannot decode.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    async for chunk in chunks:
+        text += decoder.decode(chunk)
+        cut = max(text.rfind(" "), text.rfind("\n"))
+        yield Transcript(text=text.strip(), stable=text[:cut].strip() if cut > 0 else "")
+    text = (text + decoder.decode(b"", final=True)).strip()
+    yield Transcript(text=text, stable=text, final=True)
@@ -1,7 +1,242 @@
-def text_to_speech(text: str) -> bytes:
+"""
+Text-to-speech with segment caching and streaming.
+
+Text is split into segments at punctuation; each segment is synthesized
+on its own and cached by content (backend, voice, format, text), so the
+product names and template phrases that make up order confirmations are
+synthesized once and then served from the cache (see prerender).
+Audio is 16-bit mono PCM at the backend's sample rate, sent raw or
+as WAV.
+
+TTS_BACKEND names a registered backend ("tone") or a "module:Class" path.
+"""
+
+import asyncio
+import math
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from extractor.catalog import current_catalog
+
+from .backends import load_backend
+from .tts_cache import audio_key, get_audio_cache
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "tone")
+TTS_VOICE = os.getenv("TTS_VOICE", "default")
+PAUSE_MS = 150  # silence between segments
+# Pre-render catalog names into the cache in the background at startup
+TTS_PRERENDER = os.getenv("TTS_PRERENDER", "0") == "1"
+
+FORMATS = {"wav": "audio/wav", "pcm": "audio/L16"}
+# Punctuation only splits where a word ends, so "2.5 mg" and "i.e" stay whole
+SEGMENT_SPLIT = re.compile(r"[.,;:!?]+(?=\s|$)|\n+")
+
+QUANTITY_PHRASES = [f"quantity {n}" for n in range(1, 11)]
+TEMPLATE_PHRASES = ["your order", "please confirm", "sorry", "i could not find any medicines in your order"]
+
+
+class TTSBackend:
+    name = "base"
+    sample_rate = 16000
+
+    def load(self) -> None:
+        """
+        Load the model; called once before the first synthesis.
+        """
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        """
+        16-bit little-endian mono PCM for `text`.
+        """
+        raise NotImplementedError
+
+
+class ToneBackend(TTSBackend):
+    """
+    Stand-in without a model: one short tone per word, pitch derived from
+    the word (and voice), so output is deterministic and audible.
+    """
+
+    name = "tone"
+    word_ms = 120
+    gap_ms = 40
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        rate = self.sample_rate
+        gap = np.zeros(rate * self.gap_ms // 1000, dtype=np.float32)
+        t = np.arange(rate * self.word_ms // 1000, dtype=np.float32) / rate
+        envelope = np.sin(np.pi * t / t[-1]) if len(t) > 1 else t
+        parts = []
+        for word in text.split():
+            freq = 220 + zlib.crc32(f"{voice}:{word}".encode("utf-8")) % 440
+            parts.append(0.3 * envelope * np.sin(2 * math.pi * freq * t))
+            parts.append(gap)
+        samples = np.concatenate(parts) if parts else gap
+        return (samples * 32767).astype("<i2").tobytes()
+
+
+TTS_BACKENDS = {"tone": ToneBackend}
+
+_backend: Optional[TTSBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_tts_backend() -> TTSBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = load_backend(TTS_BACKEND, TTS_BACKENDS)
+        return _backend
+
+
+def segments(text: str) -> List[str]:
+    """
+    Cache units of `text`: punctuation-separated, lowercased, whitespace
+    collapsed.
+    """
+    out = []
+    for part in SEGMENT_SPLIT.split(text or ""):
+        seg = " ".join(part.lower().split())
+        if seg:
+            out.append(seg)
+    return out
+
+
+def _pcm_format(backend: TTSBackend) -> str:
+    return f"pcm_s16le_{backend.sample_rate}"
+
+
+def synthesize_segment(segment: str, voice: str = TTS_VOICE) -> bytes:
+    """
+    PCM for one segment, from the cache or synthesized and cached.
     """
-    Placeholder for TTS integration.
+    backend = get_tts_backend()
+    cache = get_audio_cache()
+    key = audio_key(segment, voice, _pcm_format(backend), backend.name)
+    if cache is not None:
+        audio = cache.get(key)
+        if audio is not None:
+            return audio
+    audio = backend.synthesize(segment, voice)
+    if cache is not None:
+        cache.put(key, audio)
+    return audio
 
-    Later: plug in a TTS service and return audio bytes (e.g. WAV).
+
+def wav_header(sample_rate: int, data_bytes: Optional[int] = None) -> bytes:
+    """
+    RIFF/WAVE header for 16-bit mono PCM. Without `data_bytes` (streaming)
+    the sizes are set to the maximum, which players read as "until EOF".
+    """
+    data_size = 0xFFFFFFFF - 36 if data_bytes is None else data_bytes
+    return (
+        b"RIFF" + struct.pack("<I", data_size + 36) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def _pause(backend: TTSBackend) -> bytes:
+    return bytes(2 * (backend.sample_rate * PAUSE_MS // 1000))
+
+
+async def stream_speech(text: str, voice: str = TTS_VOICE, audio_format: str = "wav") -> AsyncIterator[bytes]:
+    """
+    Audio for `text`, one chunk per segment as soon as it is available.
+    Synthesis runs on a worker thread, never on the event loop.
+    """
+    backend = get_tts_backend()
+    if audio_format == "wav":
+        yield wav_header(backend.sample_rate)
+    for i, segment in enumerate(segments(text)):
+        if i:
+            yield _pause(backend)
+        yield await asyncio.to_thread(synthesize_segment, segment, voice)
+
+
+def text_to_speech(text: str, voice: str = TTS_VOICE) -> bytes:
+    """
+    Complete WAV for `text`.
+    """
+    backend = get_tts_backend()
+    parts = []
+    for i, segment in enumerate(segments(text)):
+        if i:
+            parts.append(_pause(backend))
+        parts.append(synthesize_segment(segment, voice))
+    pcm = b"".join(parts)
+    return wav_header(backend.sample_rate, len(pcm)) + pcm
+
+
+def _spoken_name(snap, medicine) -> str:
+    """
+    The catalog name of the medicine's product (as prerendered), else the
+    name it was parsed under.
+    """
+    row = snap.indexes.by_id.get(str(medicine.product_id)) if medicine.product_id else None
+    return snap.names[row] if row is not None else medicine.name
+
+
+def confirmation_text(medicines: Sequence) -> str:
+    """
+    Read-back of a parsed order, built from cacheable segments: template
+    phrases, catalog product names, "quantity N" and dosage strings.
+    """
+    if not medicines:
+        return "Sorry, I could not find any medicines in your order."
+    snap = current_catalog()
+    lines = ["Your order."]
+    for m in medicines:
+        parts = [_spoken_name(snap, m)]
+        if m.quantity:
+            parts.append(f"quantity {m.quantity}")
+        if m.dosage:
+            parts.append(m.dosage)
+        lines.append(", ".join(parts) + ".")
+    lines.append("Please confirm.")
+    return " ".join(lines)
+
+
+def prerender(phrases: Iterable[str], voice: str = TTS_VOICE) -> int:
+    """
+    Synthesize and cache every segment of `phrases` that is not cached yet;
+    returns how many were synthesized.
+    """
+    backend = get_tts_backend()
+    cache = get_audio_cache()
+    if cache is None:
+        return 0
+    done = 0
+    fmt = _pcm_format(backend)
+    for phrase in phrases:
+        for segment in segments(phrase):
+            key = audio_key(segment, voice, fmt, backend.name)
+            if not cache.contains(key):
+                cache.put(key, backend.synthesize(segment, voice))
+                done += 1
+    return done
+
+
+def prerender_catalog(voice: str = TTS_VOICE) -> int:
+    """
+    Pre-render every catalog product name, as confirmation_text speaks it,
+    plus the confirmation templates.
+    """
+    return prerender(TEMPLATE_PHRASES + QUANTITY_PHRASES + list(current_catalog().names), voice)
+
+
+def start_prerender() -> Optional[threading.Thread]:
+    """
+    prerender_catalog on a background thread if TTS_PRERENDER is set.
     """
-    return b""
\ No newline at end of file
+    if not TTS_PRERENDER:
+        return None
+    thread = threading.Thread(target=prerender_catalog, name="tts-prerender", daemon=True)
+    thread.start()
+    return thread